@@ -0,0 +1,70 @@
+"""Compare per-call connections, the connection pool and write-behind.
+
+Simulates a burst of concurrent `/progress` (stats read) and `plank_final_`
+(save) callbacks against a temporary database.
+
+Usage:
+    python -m benchmarks.bench_db_pool [--users 50] [--bursts 20]
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from db import database as db
+
+
+async def _burst(users: int):
+    tasks = []
+    for user_id in range(users):
+        if random.random() < 0.5:
+            tasks.append(db.get_user_stats(user_id))
+        else:
+            tasks.append(db.save_plank_result(user_id, f"user{user_id}", 60))
+    await asyncio.gather(*tasks)
+
+
+async def _run(users: int, bursts: int) -> float:
+    started = time.perf_counter()
+    for _ in range(bursts):
+        await _burst(users)
+    return time.perf_counter() - started
+
+
+async def main(users: int, bursts: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_NAME = str(Path(tmp) / "bench.db")
+        await db.init_db()
+
+        per_call = await _run(users, bursts)
+
+        await db.open_pool()
+        try:
+            pooled = await _run(users, bursts)
+
+            await db.start_writer()
+            try:
+                write_behind = await _run(users, bursts)
+            finally:
+                await db.stop_writer()
+        finally:
+            await db.close_pool()
+
+    total = users * bursts
+    print(f"{'mode':<10}{'seconds':>10}{'ops/sec':>12}")
+    print(f"{'per-call':<10}{per_call:>10.3f}{total / per_call:>12.0f}")
+    print(f"{'pooled':<10}{pooled:>10.3f}{total / pooled:>12.0f}")
+    print(f"{'batched':<10}{write_behind:>10.3f}{total / write_behind:>12.0f}")
+    print(f"pool speedup: {per_call / pooled:.2f}x")
+    print(f"write-behind speedup: {per_call / write_behind:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--bursts", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.bursts))
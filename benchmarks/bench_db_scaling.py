@@ -0,0 +1,111 @@
+"""Measure how the plank read queries scale with table size and concurrency.
+
+For each user count a fresh database is filled by benchmarks.generate_data,
+then get_user_stats, get_plank_page and get_plank_series are called
+for random users at each concurrency level through the connection pool.
+The stats cache is invalidated before every call, so each call hits SQLite.
+
+Usage:
+    python -m benchmarks.bench_db_scaling [--users 100,1000,5000]
+        [--days 730] [--concurrency 1,8,32] [--calls 200] [--output scaling.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.generate_data import generate
+from db import database as db
+
+QUERIES = {
+    "get_user_stats": db.get_user_stats,
+    "get_plank_page": db.get_plank_page,
+    "get_plank_series": db.get_plank_series,
+}
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(part) for part in value.split(",")]
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(q * len(ordered)) - 1))]
+
+
+async def _measure(query, users: int, concurrency: int, calls: int) -> dict:
+    latencies: list[float] = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def call(user_id: int):
+        async with slots:
+            db.stats_cache.invalidate_user(user_id)
+            started = time.perf_counter()
+            await query(user_id)
+            latencies.append(time.perf_counter() - started)
+
+    user_ids = [random.randint(1, users) for _ in range(calls)]
+    started = time.perf_counter()
+    await asyncio.gather(*(call(user_id) for user_id in user_ids))
+    elapsed = time.perf_counter() - started
+    return {
+        "ops_per_sec": calls / elapsed,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+    }
+
+
+async def main(args: argparse.Namespace) -> list[dict]:
+    random.seed(args.seed)
+    results = []
+    print(
+        f"{'rows':>10}{'users':>7}  {'query':<19}{'conc':>5}"
+        f"{'ops/sec':>10}{'p50 ms':>9}{'p95 ms':>9}"
+    )
+    for users in args.users:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_NAME = str(Path(tmp) / "bench.db")
+            await db.init_db()
+            rows = await generate(db.DB_NAME, users, args.days, args.seed)
+
+            await db.open_pool(max(args.concurrency))
+            try:
+                for name, query in QUERIES.items():
+                    for concurrency in args.concurrency:
+                        stats = await _measure(query, users, concurrency, args.calls)
+                        results.append(
+                            {
+                                "rows": rows,
+                                "users": users,
+                                "query": name,
+                                "concurrency": concurrency,
+                                **stats,
+                            }
+                        )
+                        print(
+                            f"{rows:>10}{users:>7}  {name:<19}{concurrency:>5}"
+                            f"{stats['ops_per_sec']:>10.0f}{stats['p50_ms']:>9.2f}"
+                            f"{stats['p95_ms']:>9.2f}"
+                        )
+            finally:
+                await db.close_pool()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=_int_list, default=[100, 1000, 5000])
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the table as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
@@ -0,0 +1,69 @@
+"""Compare MemoryStorage and SQLiteStorage on plank slider taps.
+
+Each tap does what `process_plank_adjustment` does with the FSM: read the
+data and write back `current_seconds` and `slider_version`. Users tap
+concurrently; the SQLite storage is closed at the end so its final flush
+is included in the timing.
+
+Usage:
+    python -m benchmarks.bench_fsm_storage [--users 200] [--taps 50]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from db import database as db
+from db.fsm_storage import SQLiteStorage
+from handlers.plank import PlankState
+
+
+async def _user_taps(storage: BaseStorage, user_id: int, taps: int):
+    key = StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+    await storage.set_state(key, PlankState.adjusting)
+    for _ in range(taps):
+        data = await storage.get_data(key)
+        await storage.update_data(
+            key,
+            {
+                "current_seconds": data.get("current_seconds", 60) + 5,
+                "slider_version": data.get("slider_version", 0) + 1,
+            },
+        )
+
+
+async def _run(storage: BaseStorage, users: int, taps: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(_user_taps(storage, u, taps) for u in range(users)))
+    await storage.close()
+    return time.perf_counter() - started
+
+
+async def main(users: int, taps: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_NAME = str(Path(tmp) / "bench.db")
+        await db.init_db()
+
+        memory = await _run(MemoryStorage(), users, taps)
+        cold = await _run(SQLiteStorage(db.DB_NAME), users, taps)
+        # A second run starts from rows persisted by the first one.
+        warm = await _run(SQLiteStorage(db.DB_NAME), users, taps)
+
+    total = users * taps
+    print(f"{'storage':<14}{'seconds':>10}{'taps/sec':>12}")
+    print(f"{'memory':<14}{memory:>10.3f}{total / memory:>12.0f}")
+    print(f"{'sqlite (new)':<14}{cold:>10.3f}{total / cold:>12.0f}")
+    print(f"{'sqlite (load)':<14}{warm:>10.3f}{total / warm:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--taps", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.taps))
@@ -0,0 +1,89 @@
+"""Measure event-loop latency while progress graphs render.
+
+A heartbeat task stands in for unrelated handlers: it sleeps for a fixed
+tick and records how late it wakes up while N graphs render, first inline
+on the event loop (the old behaviour) and then through the process pool.
+
+Usage:
+    python -m benchmarks.bench_graph_render [--graphs 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from services.graph_renderer import GraphRenderer
+from views.plank import render_progress_png
+
+TICK = 0.01
+
+
+def _points(user_id: int) -> list[tuple[datetime, int]]:
+    start = datetime(2025, 1, 1)
+    return [(start + timedelta(days=i), 60 + (i * user_id) % 90) for i in range(30)]
+
+
+async def _heartbeat(lags: list[float], stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(TICK)
+        lags.append(loop.time() - started - TICK)
+
+
+async def _measure(render_all) -> tuple[float, list[float]]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(lags, stop))
+    await asyncio.sleep(TICK * 2)
+
+    started = time.perf_counter()
+    await render_all()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await heartbeat
+    return elapsed, lags
+
+
+def _report(name: str, elapsed: float, lags: list[float]):
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p95 = lags_ms[int(len(lags_ms) * 0.95) - 1] if len(lags_ms) > 1 else lags_ms[0]
+    print(
+        f"{name:<10}{elapsed:>10.2f}{statistics.median(lags_ms):>12.1f}"
+        f"{p95:>12.1f}{max(lags_ms):>12.1f}"
+    )
+
+
+async def main(graphs: int):
+    async def inline():
+        for user_id in range(graphs):
+            render_progress_png(_points(user_id))
+            await asyncio.sleep(0)
+
+    renderer = GraphRenderer(workers=2, timeout=120)
+    renderer.start()
+    # Warm up the worker processes so spawn cost is not measured.
+    await asyncio.gather(*(renderer.render(-i, _points(1)) for i in range(2)))
+
+    async def pooled():
+        await asyncio.gather(
+            *(renderer.render(user_id, _points(user_id)) for user_id in range(graphs))
+        )
+
+    print(
+        f"{'mode':<10}{'seconds':>10}{'lag p50 ms':>12}{'lag p95 ms':>12}{'max ms':>12}"
+    )
+    try:
+        _report("inline", *await _measure(inline))
+        _report("pool", *await _measure(pooled))
+    finally:
+        renderer.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--graphs", type=int, default=20)
+    asyncio.run(main(parser.parse_args().graphs))
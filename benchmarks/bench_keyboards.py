@@ -0,0 +1,40 @@
+"""Microbenchmark inline keyboard construction with and without memoization.
+
+Usage:
+    python -m benchmarks.bench_keyboards [--iterations 20000]
+"""
+
+import argparse
+import timeit
+from datetime import date, datetime
+
+from views.plank import get_plank_result_keyboard, get_plank_slider_keyboard
+from views.yoga import _build_week_keyboard, get_yoga_time_keyboard
+
+TODAY = date.today()
+CHOSEN = datetime.combine(TODAY, datetime.min.time())
+
+CASES = {
+    "plank slider": (get_plank_slider_keyboard, (60,)),
+    "plank result": (get_plank_result_keyboard, (42,)),
+    "week": (_build_week_keyboard, (TODAY,)),
+    "time slots": (get_yoga_time_keyboard, (3.0, CHOSEN)),
+}
+
+
+def main(iterations: int):
+    print(f"{'keyboard':<14}{'uncached us':>14}{'cached us':>12}{'speedup':>10}")
+    for name, (factory, args) in CASES.items():
+        uncached = timeit.timeit(lambda: factory.__wrapped__(*args), number=iterations)
+        factory(*args)
+        cached = timeit.timeit(lambda: factory(*args), number=iterations)
+        print(
+            f"{name:<14}{uncached / iterations * 1e6:>14.1f}"
+            f"{cached / iterations * 1e6:>12.2f}{uncached / cached:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    main(parser.parse_args().iterations)
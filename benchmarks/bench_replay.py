@@ -0,0 +1,303 @@
+"""Replay updates through the real dispatcher from main.py.
+
+Builds a synthetic workload (or loads recorded updates) and feeds it to
+`main.dp` with an offline session, inside a temporary working directory
+with its own users files and database. Each synthetic plank user runs
+/plank, slider taps, plank_final_, /progress, the details view and /graph;
+the first user schedules a yoga session and every user votes on it. Users
+run concurrently, each user's updates in order. Outbound rate limiting is
+not applied, so the numbers measure the bot itself.
+
+Reports updates/sec and p50/p95/p99 latency per handler, and writes the
+results as JSON so runs can be compared with --baseline.
+
+Usage:
+    python -m benchmarks.bench_replay [--users 50] [--taps 8] [--latency 0]
+        [--updates recorded.json] [--save-updates workload.json]
+        [--output results.json] [--baseline previous.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from aiogram.types import Update
+
+from benchmarks.fake_session import FAKE_TOKEN, RecordingSession
+
+GROUP_CHAT_ID = -1000
+SESSION_MESSAGE_ID = 1
+
+
+class _Workload:
+    """Synthetic update factory with unique update and message ids."""
+
+    def __init__(self):
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(SESSION_MESSAGE_ID + 1)
+        self._now = int(datetime.now(timezone.utc).timestamp())
+
+    @staticmethod
+    def user(user_id: int) -> dict:
+        return {
+            "id": user_id,
+            "is_bot": False,
+            "first_name": f"Bench{user_id}",
+            "username": f"bench{user_id}",
+        }
+
+    def command(self, user_id: int, command: str) -> dict:
+        return {
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": self._now,
+                "chat": {"id": user_id, "type": "private"},
+                "from": self.user(user_id),
+                "text": command,
+                "entities": [
+                    {"type": "bot_command", "offset": 0, "length": len(command)}
+                ],
+            },
+        }
+
+    def callback(
+        self, user_id: int, data: str, chat_id: int, message_id: int, text: str = ""
+    ) -> dict:
+        update_id = next(self._update_ids)
+        chat_type = "supergroup" if chat_id < 0 else "private"
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self.user(user_id),
+                "chat_instance": str(chat_id),
+                "data": data,
+                "message": {
+                    "message_id": message_id,
+                    "date": self._now,
+                    "chat": {"id": chat_id, "type": chat_type},
+                    "text": text or "bench",
+                },
+            },
+        }
+
+    def plank_flow(self, user_id: int, taps: int) -> list[dict]:
+        slider_id = next(self._message_ids)
+        updates = [self.command(user_id, "/plank")]
+        for _ in range(taps):
+            step = random.choice(("5", "-5", "10", "-10"))
+            updates.append(
+                self.callback(user_id, f"plank_adj_{step}", user_id, slider_id)
+            )
+        updates += [
+            self.callback(user_id, "plank_final_01:00", user_id, slider_id),
+            self.command(user_id, "/progress"),
+            self.callback(user_id, "show_stats_details", user_id, slider_id),
+            self.command(user_id, "/graph"),
+        ]
+        return updates
+
+    def yoga_setup(self, admin_id: int) -> list[dict]:
+        day = (date.today() + timedelta(days=1)).isoformat()
+        return [
+            self.command(admin_id, "/yoga"),
+            self.callback(admin_id, f"day_{day}", GROUP_CHAT_ID, SESSION_MESSAGE_ID),
+            self.callback(admin_id, "time_16:00", GROUP_CHAT_ID, SESSION_MESSAGE_ID),
+        ]
+
+    def vote(self, user_id: int) -> dict:
+        return self.callback(
+            user_id,
+            random.choice(("approve", "reject")),
+            GROUP_CHAT_ID,
+            SESSION_MESSAGE_ID,
+            text="Shall we confirm?",
+        )
+
+
+def build_workload(users: int, taps: int) -> list[list[dict]]:
+    """Return one ordered list of updates per stream (setup stream first)."""
+    workload = _Workload()
+    user_ids = [1000 + i for i in range(users)]
+    streams = [workload.yoga_setup(user_ids[0])]
+    for user_id in user_ids:
+        streams.append(workload.plank_flow(user_id, taps) + [workload.vote(user_id)])
+    return streams
+
+
+def handler_name(update: dict) -> str:
+    """Label an update by the handler it is routed to."""
+    if "message" in update:
+        return update["message"].get("text", "").split()[0] or "message"
+    data = update.get("callback_query", {}).get("data", "")
+    if data in ("approve", "reject"):
+        return "vote"
+    for prefix in ("plank_adj_", "plank_final_", "cancel_plank:", "back_to_plank:"):
+        if data.startswith(prefix):
+            return prefix.rstrip("_:")
+    if data.startswith(("day_", "time_")):
+        return data.split("_")[0]
+    return data or "other"
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _replay(streams: list[list[dict]], latency: float) -> dict:
+    import main
+    from config import DB_WRITE_BEHIND
+
+    await main.init_db()
+    await main.open_pool()
+    if DB_WRITE_BEHIND:
+        await main.start_writer()
+    main.graph_renderer.start()
+    session = RecordingSession(latency=latency)
+    main.bot.session = session
+
+    timings: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+
+    async def feed(stream: list[dict]):
+        for raw in stream:
+            name = handler_name(raw)
+            update = Update.model_validate(raw, context={"bot": main.bot})
+            started = time.perf_counter()
+            try:
+                await main.dp.feed_update(main.bot, update)
+            except Exception:
+                errors[name] += 1
+            timings[name].append(time.perf_counter() - started)
+
+    try:
+        # The setup stream (yoga session) must exist before the votes.
+        await feed(streams[0])
+        started = time.perf_counter()
+        await asyncio.gather(*(feed(stream) for stream in streams[1:]))
+        elapsed = time.perf_counter() - started
+    finally:
+        await main.dp.storage.close()
+        main.graph_renderer.stop()
+        await main.stop_writer()
+        await main.close_pool()
+
+    total = sum(len(stream) for stream in streams[1:])
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "updates": total,
+        "seconds": elapsed,
+        "updates_per_sec": total / elapsed,
+        "api_calls": len(session.calls),
+        "handlers": {
+            name: {
+                "count": len(values),
+                "errors": errors[name],
+                "p50_ms": _percentile(values, 0.50) * 1000,
+                "p95_ms": _percentile(values, 0.95) * 1000,
+                "p99_ms": _percentile(values, 0.99) * 1000,
+            }
+            for name, values in sorted(timings.items())
+        },
+    }
+
+
+def _report(results: dict, baseline: dict | None):
+    print(
+        f"{results['updates']} updates in {results['seconds']:.2f}s: "
+        f"{results['updates_per_sec']:.0f} updates/sec, "
+        f"{results['api_calls']} API calls"
+    )
+    if baseline:
+        change = results["updates_per_sec"] / baseline["updates_per_sec"] - 1
+        print(
+            f"baseline: {baseline['updates_per_sec']:.0f} updates/sec ({change:+.1%})"
+        )
+
+    print(
+        f"{'handler':<20}{'count':>7}{'errors':>8}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'Δp95':>9}"
+    )
+    for name, stats in results["handlers"].items():
+        old = (baseline or {}).get("handlers", {}).get(name)
+        delta = f"{stats['p95_ms'] - old['p95_ms']:+.1f}" if old else ""
+        print(
+            f"{name:<20}{stats['count']:>7}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+            f"{delta:>9}"
+        )
+
+
+def main(args: argparse.Namespace):
+    if args.updates:
+        from services.webhook import load_updates
+
+        # Recorded updates keep their original order in a single stream.
+        streams = [[], load_updates(args.updates)]
+    else:
+        random.seed(args.seed)
+        streams = build_workload(args.users, args.taps)
+    if args.save_updates:
+        with open(args.save_updates, "w", encoding="utf-8") as f:
+            json.dump([update for stream in streams for update in stream], f)
+
+    users = sorted(
+        {
+            raw[kind]["from"]["username"]
+            for stream in streams
+            for raw in stream
+            for kind in ("message", "callback_query")
+            if kind in raw and raw[kind].get("from", {}).get("username")
+        }
+    )
+    output = Path(args.output).resolve() if args.output else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("users_yoga.json", "users_plank.json"):
+            Path(tmp, name).write_text(json.dumps({user: 0 for user in users}))
+        os.environ["BOT_TOKEN"] = FAKE_TOKEN
+        os.environ["BOT_MODE"] = "polling"
+        os.chdir(tmp)
+        try:
+            results = asyncio.run(_replay(streams, args.latency))
+        finally:
+            os.chdir(cwd)
+
+    results["args"] = {k: v for k, v in vars(args).items() if k != "baseline"}
+    _report(results, baseline)
+    if output:
+        output.write_text(json.dumps(results, indent=2))
+        print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--taps", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="API latency (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--updates", help="replay recorded updates from a JSON file")
+    parser.add_argument("--save-updates", help="write the workload as JSON")
+    parser.add_argument(
+        "--output",
+        default=f"bench_replay_{datetime.now():%Y%m%d_%H%M%S}.json",
+        help="where to write the JSON results",
+    )
+    parser.add_argument("--baseline", help="earlier results JSON to compare with")
+    main(parser.parse_args())
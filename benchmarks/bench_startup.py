@@ -0,0 +1,95 @@
+"""Measure bot start-up: import time and time to the first handled update.
+
+Each measurement runs in a fresh interpreter inside a temporary working
+directory, so module caches and the database start cold. The first update
+is a `/plank` command fed through the real dispatcher from main.py with an
+offline session.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.fake_session import FAKE_TOKEN
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+CHILD_SCRIPT = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+from datetime import datetime, timezone
+from aiogram.types import Update
+from benchmarks.fake_session import RecordingSession
+
+async def first_update():
+    await main.init_db()
+    main.bot.session = RecordingSession()
+    update = Update.model_validate({
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "date": int(datetime.now(timezone.utc).timestamp()),
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Bench", "username": "bench"},
+            "text": "/plank",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    })
+    await main.dp.feed_update(main.bot, update)
+    handled = time.perf_counter()
+    await main.dp.storage.close()
+    return handled
+
+handled = asyncio.run(first_update())
+print(json.dumps({
+    "import_s": imported - started,
+    "first_update_s": handled - started,
+    "matplotlib_loaded": "matplotlib" in sys.modules,
+}))
+"""
+
+
+def _run_once() -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("users_yoga.json", "users_plank.json"):
+            Path(tmp, name).write_text(json.dumps({"bench": 0}))
+        env = dict(
+            os.environ,
+            BOT_TOKEN=FAKE_TOKEN,
+            PYTHONPATH=str(REPO_ROOT),
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT],
+            cwd=tmp,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs: int):
+    results = [_run_once() for _ in range(runs)]
+    import_ms = statistics.median(r["import_s"] for r in results) * 1000
+    first_ms = statistics.median(r["first_update_s"] for r in results) * 1000
+    print(f"import main:          {import_ms:8.1f} ms (median of {runs})")
+    print(f"first handled update: {first_ms:8.1f} ms (median of {runs})")
+    print(f"matplotlib loaded:    {any(r['matplotlib_loaded'] for r in results)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    main(parser.parse_args().runs)
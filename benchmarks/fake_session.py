@@ -0,0 +1,65 @@
+"""Offline aiogram session that records API calls instead of sending them."""
+
+import asyncio
+import itertools
+import time
+import typing
+from datetime import datetime, timezone
+
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import SendPhoto
+from aiogram.types import Chat, Message, PhotoSize
+
+FAKE_TOKEN = "123456789:AAFakeTokenForOfflineBenchmarksOnly0000"
+
+
+class RecordingSession(BaseSession):
+    """Answer every Bot API method with a plausible result, without network."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls: list = []
+        self._message_ids = itertools.count(10_000)
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls.append((time.perf_counter(), method))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        returning = method.__returning__
+        options = typing.get_args(returning) or (returning,)
+        if Message in options:
+            return self._message(method)
+        if typing.get_origin(returning) is list:
+            return []
+        return True
+
+    async def stream_content(
+        self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True
+    ):
+        yield b""
+
+    async def close(self):
+        pass
+
+    def _message(self, method) -> Message:
+        chat_id = getattr(method, "chat_id", None) or 1
+        message_id = getattr(method, "message_id", None) or next(self._message_ids)
+        photo = None
+        if isinstance(method, SendPhoto):
+            photo = [
+                PhotoSize(
+                    file_id=f"photo-{message_id}",
+                    file_unique_id=f"unique-{message_id}",
+                    width=1000,
+                    height=600,
+                )
+            ]
+        return Message(
+            message_id=message_id,
+            date=datetime.now(timezone.utc),
+            chat=Chat(id=int(chat_id), type="private"),
+            text=getattr(method, "text", None),
+            photo=photo,
+        )
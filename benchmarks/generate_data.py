@@ -0,0 +1,105 @@
+"""Bulk-load realistic synthetic plank history into a database.
+
+Every user trains on most days with one to three attempts, and their
+times improve slowly with day-to-day noise. Rows are streamed into a
+single executemany() inside one transaction, then the daily rollup is
+rebuilt, so millions of rows load in seconds.
+
+Usage:
+    python -m benchmarks.generate_data --db synthetic.db
+        [--users 1000] [--days 730] [--seed 1]
+
+The bot's own database (config.DB_NAME) is refused, so synthetic rows
+never end up in real history.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timezone
+
+import aiosqlite
+
+from config import DB_NAME
+from db.rollup import backfill_rollup, backfill_usernames
+from utils import local_epoch_day
+
+TRAINING_PROBABILITY = 0.7
+MAX_ATTEMPTS_PER_DAY = 3
+
+
+def plank_rows(users: int, days: int, seed: int = 1, first_user_id: int = 1):
+    """Yield (user_id, username, duration, day, created_at) rows, oldest first."""
+    rng = random.Random(seed)
+    today = local_epoch_day(datetime.now(timezone.utc), 0)
+    profiles = [
+        (first_user_id + i, rng.randint(20, 90), rng.uniform(0.02, 0.2))
+        for i in range(users)
+    ]
+    for offset in range(days - 1, -1, -1):
+        day = today - offset
+        # Midday UTC, so the timestamp falls inside the day it is bucketed in.
+        created_at = day * 86400 + 43200
+        progress = days - offset
+        for user_id, base, gain in profiles:
+            if rng.random() > TRAINING_PROBABILITY:
+                continue
+            for _ in range(rng.randint(1, MAX_ATTEMPTS_PER_DAY)):
+                duration = max(10, int(base + gain * progress + rng.gauss(0, 10)))
+                yield user_id, f"user{user_id}", duration, day, created_at
+
+
+async def generate(path: str, users: int, days: int, seed: int = 1) -> int:
+    """Append synthetic history to the database at path.
+
+    The schema must exist (run init_db first).
+
+    Returns:
+        Number of plank_history rows inserted.
+    """
+    async with aiosqlite.connect(path) as db:
+        await db.execute("BEGIN")
+        try:
+            cursor = await db.executemany(
+                "INSERT INTO plank_history "
+                "(user_id, username, duration, day, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                plank_rows(users, days, seed),
+            )
+            inserted = cursor.rowcount
+            await backfill_rollup(db)
+            await backfill_usernames(db)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+    return inserted
+
+
+async def _main(path: str, users: int, days: int, seed: int):
+    from db import database
+
+    if os.path.abspath(path) == os.path.abspath(DB_NAME):
+        print(f"Refusing to write synthetic data into the bot database {path}")
+        raise SystemExit(1)
+
+    database.DB_NAME = path
+    await database.init_db()
+    started = time.perf_counter()
+    inserted = await generate(path, users, days, seed)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Inserted {inserted} rows in {elapsed:.1f}s ({inserted / elapsed:.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="database file to fill")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(_main(args.db, args.users, args.days, args.seed))
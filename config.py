@@ -2,6 +2,29 @@
 
 # --- Database ---
 DB_NAME = "yoga_community.db"
+DB_JOURNAL_MODE = "WAL"  # Readers never block the writer
+DB_SYNCHRONOUS = "NORMAL"  # Safe with WAL, avoids an fsync per commit
+DB_CACHE_SIZE = -8000  # Page cache per connection (negative means KiB)
+DB_POOL_SIZE = 4  # Long-lived connections shared by all queries
+DB_CACHED_STATEMENTS = 64  # Prepared statements kept per pooled connection
+DB_WRITE_BEHIND = True  # Group-commit plank results through a write queue
+DB_WRITE_BATCH_SIZE = 50  # Max operations flushed in one transaction
+DB_WRITE_MAX_DELAY = 0.005  # Seconds to wait for more writes before flushing
+DB_WRITE_RETRIES = 4  # Retries of a failed write batch before isolating its ops
+DB_WRITE_RETRY_DELAY = 0.1  # First retry delay in seconds, doubled each retry
+STATS_CACHE_MAX_ENTRIES = 2000  # Cached stats/details results across all users
+STATS_CACHE_MAX_BYTES = 4 * 1024 * 1024  # Approximate memory cap for the cache
+FSM_FLUSH_INTERVAL = 1.0  # Seconds between write-backs of changed FSM states
+FSM_STATE_TTL = 7 * 24 * 3600  # Seconds an idle FSM state is kept before expiry
+DB_PROFILE = False  # Time every query and capture plans (toggle with /slowqueries)
+DB_SLOW_QUERY_MS = 50  # Queries slower than this are logged with their plan
+DB_PROFILE_TOP_N = 10  # Slowest distinct queries kept for /slowqueries
+
+# --- Users ---
+USERS_YOGA_FILE = "users_yoga.json"  # Yoga guest list: username -> UTC offset
+USERS_PLANK_FILE = "users_plank.json"  # Plank guest list: username -> UTC offset
+USER_REGISTRY_POLL_INTERVAL = 2.0  # Seconds between checks for edited files
+USER_REGISTRY_DEBOUNCE = 1.0  # Seconds a file must stay unchanged before reload
 
 # --- Yoga Configuration ---
 MIN_PARTICIPANTS = 2  # Minimum participants needed to confirm a yoga session
@@ -12,6 +35,8 @@ DEFAULT_SLOTS_UTC = [
     "17:30",
     "18:00",
 ]  # Available time slots in UTC
+YOGA_EDIT_INTERVAL = 1.0  # Min seconds between edits of one session message
+YOGA_SUMMARY_NAMES_PER_OFFSET = 20  # Names listed per UTC offset in a summary
 
 YOGA_JOKES = [
     "I work out… so I can eat more later 🍕",
@@ -104,6 +129,17 @@ YOGA_BTN_DELETE = "❌ Delete"
 # --- Plank Configuration ---
 PLANK_MIN_SECONDS = 10
 PLANK_INITIAL_SECONDS = 60
+PLANK_SLIDER_EDIT_INTERVAL = 0.5  # Min seconds between slider keyboard edits
+PLANK_STATS_WINDOWS = (7, 30)  # Days covered by /progress statistics
+PLANK_DETAILS_PAGE_SIZE = 20  # Attempts per page of the details log
+LEADERBOARD_SIZE = 10  # Users listed per /leaderboard table
+LEADERBOARD_PERIODS = {"week": 7, "month": 30, "all": None}  # /leaderboard args
+PLANK_GRAPH_RANGES = {"30": 30, "90": 90, "365": 365, "all": None}  # /graph args
+PLANK_GRAPH_DEFAULT_RANGE = "30"  # Range plotted by a bare /graph
+PLANK_GRAPH_WEEKLY_AFTER = 120  # Ranges longer than this (days) plot weeks
+PLANK_GRAPH_MAX_POINTS = 120  # Points plotted after LTTB downsampling
+GRAPH_RENDER_WORKERS = 2  # Worker processes rendering progress graphs
+GRAPH_RENDER_TIMEOUT = 15.0  # Seconds before a graph render is abandoned
 
 PLANK_MOTIVATION = [
     "Great effort! Keep pushing your limits! 💪",
@@ -160,8 +196,7 @@ PLANK_TEXT_CHALLENGE_TITLE = "💪 **Plank Challenge**\n{user_name}, adjust your
 PLANK_TEXT_DELETE_SUCCESS = "Result deleted 🗑"
 PLANK_TEXT_DELETE_NONE = "No record to delete."
 PLANK_TEXT_DELETE_ERROR = "Window closed or no record to delete."
-
-PLANK_TEXT_TOO_FAST = "Too fast! Wait {seconds}s"
+PLANK_TEXT_SAVE_ERROR = "Could not save the result, please try again."
 
 PLANK_TEXT_PLANK_COMPLETED = (
     "🏆 **Plank Completed!**\n\n"
@@ -177,11 +212,23 @@ PLANK_TEXT_STATS_MONTH_TITLE = "📅 **Month (30 days):**\n"
 PLANK_TEXT_STATS_TAGLINE = "<i>The more you do, the easier it gets!</i> 💪"
 
 PLANK_TEXT_NO_DATA = "No data yet"
-PLANK_TEXT_DETAILS_HEADER = "📝 **Attempt History (30 days):**\n\n"
+PLANK_TEXT_DETAILS_HEADER = "📝 **Attempt History:**\n\n"
 
 PLANK_TEXT_GRAPH_NO_DATA = "No data for graph yet! Complete at least one plank."
 PLANK_TEXT_GRAPH_CAPTION = "📈 Your Progress Graph"
 PLANK_TEXT_GRAPH_ERROR = "Error creating graph."
+PLANK_TEXT_GRAPH_USAGE = "Usage: /graph [30|90|365|all]"
+
+PLANK_TEXT_LEADERBOARD_HEADER = "🏆 <b>Plank Leaderboard ({period})</b>\n\n"
+PLANK_TEXT_LEADERBOARD_BEST = "💪 <b>Best hold:</b>\n"
+PLANK_TEXT_LEADERBOARD_TOTAL = "⏱ <b>Total time:</b>\n"
+PLANK_TEXT_LEADERBOARD_PERIODS = {
+    "week": "7 days",
+    "month": "30 days",
+    "all": "all time",
+}
+PLANK_TEXT_LEADERBOARD_EMPTY = "No planks recorded for this period yet."
+PLANK_TEXT_LEADERBOARD_USAGE = "Usage: /leaderboard [week|month|all]"
 
 # --- Plank Buttons ---
 PLANK_BTN_DELETE = "❌ Delete"
@@ -189,6 +236,11 @@ PLANK_BTN_BACK = "⬅️ Back"
 PLANK_BTN_CONFIRM = "✅ Confirm"
 PLANK_BTN_DETAILS = "📝 Details (Log)"
 PLANK_BTN_HIDE = "⬆️ Hide"
+PLANK_BTN_NEWER = "⬅️ Newer"
+PLANK_BTN_OLDER = "Older ➡️"
+
+# --- Keyboards ---
+KEYBOARD_CACHE_SIZE = 512  # Memoized inline keyboards per factory
 
 # --- Bot Commands ---
 BOT_COMMANDS = [
@@ -196,8 +248,30 @@ BOT_COMMANDS = [
     ("yoga", "🧘‍♀️ Schedule a session"),
     ("progress", "📊 My statistics"),
     ("graph", "📈 Progress graph"),
+    ("leaderboard", "🏆 Plank leaderboard"),
 ]
 
+# --- Telegram API Limits ---
+TELEGRAM_GLOBAL_RATE = 30  # Messages per second across all chats
+TELEGRAM_CHAT_RATE = 1  # Messages per second in one private chat
+TELEGRAM_GROUP_RATE = 20 / 60  # Messages per second in one group
+TELEGRAM_CHAT_BURST = 3  # Messages a chat may send back-to-back
+TELEGRAM_MAX_RETRIES = 3  # Retries after TelegramRetryAfter before giving up
+
+# --- Webhook ---
+WEBHOOK_PATH = "/webhook"  # Route Telegram posts updates to
+WEBHOOK_HOST = "0.0.0.0"  # Interface the embedded server listens on
+WEBHOOK_PORT = 8080  # Port the embedded server listens on
+WEBHOOK_MAX_CONCURRENCY = 40  # Updates processed at the same time
+WEBHOOK_MAX_PENDING = 1000  # Accepted updates waiting to run before answering 503
+WEBHOOK_DRAIN_TIMEOUT = 10.0  # Seconds to finish accepted updates on shutdown
+
+# --- Metrics ---
+METRICS_ENABLED = True  # Serve Prometheus metrics while the bot runs
+METRICS_HOST = "127.0.0.1"  # Local interface for the /metrics endpoint
+METRICS_PORT = 9101  # Port for the /metrics endpoint
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # Seconds
+
 # --- Logging ---
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
@@ -0,0 +1,114 @@
+import sys
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+
+def _estimate_size(value) -> int:
+    """Roughly estimate the memory held by a cached query result."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_estimate_size(item) for item in value)
+    return size
+
+
+class StatsCache:
+    """Per-user LRU cache for statistics queries.
+
+    Entries are dropped when a user's plank history changes and all at once
+    when the UTC day rolls over, since the stats windows are date-relative.
+    Each user has a generation counter so a query that raced with a write
+    never stores its (possibly stale) result.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self._user_keys: dict[int, set[tuple]] = {}
+        self._generations: dict[int, int] = {}
+        self._bytes = 0
+        self._day = self._today()
+
+    @staticmethod
+    def _today():
+        return datetime.now(timezone.utc).date()
+
+    def _check_rollover(self):
+        today = self._today()
+        if today != self._day:
+            self.clear()
+            self._day = today
+
+    def generation(self, user_id: int) -> int:
+        """Return the counter to pass back to put() after a query."""
+        return self._generations.get(user_id, 0)
+
+    def get(self, user_id: int, key: tuple):
+        """Return a cached value or None, counting hits and misses."""
+        self._check_rollover()
+        entry = self._entries.get((user_id, key))
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end((user_id, key))
+        self.hits += 1
+        return entry[0]
+
+    def put(self, user_id: int, key: tuple, value, generation: int):
+        """Store a value unless the user's data changed while it was queried."""
+        if generation != self.generation(user_id):
+            return
+
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        full_key = (user_id, key)
+        self._discard(full_key)
+        self._entries[full_key] = (value, size)
+        self._user_keys.setdefault(user_id, set()).add(full_key)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+
+    def invalidate_user(self, user_id: int):
+        """Drop every entry of a user whose plank history changed."""
+        self._generations[user_id] = self.generation(user_id) + 1
+        for full_key in self._user_keys.pop(user_id, set()):
+            entry = self._entries.pop(full_key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        self._entries.clear()
+        self._user_keys.clear()
+        self._bytes = 0
+
+    def snapshot(self) -> dict:
+        """Return hit/miss counters and current usage."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def _discard(self, full_key: tuple):
+        entry = self._entries.pop(full_key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[1]
+        keys = self._user_keys.get(full_key[0])
+        if keys is not None:
+            keys.discard(full_key)
+            if not keys:
+                del self._user_keys[full_key[0]]
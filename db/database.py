@@ -1,59 +1,185 @@
 import aiosqlite
-from datetime import datetime
-from config import DB_NAME
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from config import (
+    DB_CACHED_STATEMENTS,
+    DB_JOURNAL_MODE,
+    DB_NAME,
+    DB_POOL_SIZE,
+    DB_WRITE_BATCH_SIZE,
+    DB_WRITE_MAX_DELAY,
+    LEADERBOARD_PERIODS,
+    LEADERBOARD_SIZE,
+    PLANK_DETAILS_PAGE_SIZE,
+    PLANK_STATS_WINDOWS,
+    STATS_CACHE_MAX_BYTES,
+    STATS_CACHE_MAX_ENTRIES,
+)
+from db.cache import StatsCache
+from db.leaderboard import Leaderboard
+from db.migrations import run_migrations
+from db.pool import ConnectionPool, configure_connection
+from db.profiler import query_profiler
+from db.rollup import add_to_rollup, delete_plank_row, remember_username
+from db.writer import PlankWriter
+from services.metrics import DB_QUERY_SECONDS, timed
+from utils import local_epoch_day
+
+_pool: ConnectionPool | None = None
+_writer: PlankWriter | None = None
+
+stats_cache = StatsCache(STATS_CACHE_MAX_ENTRIES, STATS_CACHE_MAX_BYTES)
+leaderboard = Leaderboard(LEADERBOARD_SIZE, LEADERBOARD_PERIODS)
+
+
+async def open_pool(size: int = DB_POOL_SIZE):
+    """Open the shared connection pool used by all queries."""
+    global _pool
+    if _pool is not None:
+        return
+    pool = ConnectionPool(DB_NAME, size, DB_CACHED_STATEMENTS)
+    await pool.open()
+    _pool = pool
+
+
+async def close_pool():
+    """Close the shared connection pool if it is open."""
+    global _pool
+    if _pool is None:
+        return
+    pool, _pool = _pool, None
+    await pool.close()
+
+
+def _plank_committed(user_id, username, duration, day):
+    """Count a write-behind insert in the leaderboard once it is committed."""
+    leaderboard.record(user_id, username, day, duration)
+
+
+async def start_writer(
+    batch_size: int = DB_WRITE_BATCH_SIZE, max_delay: float = DB_WRITE_MAX_DELAY
+):
+    """Switch plank writes to the write-behind group-commit queue."""
+    global _writer
+    if _writer is not None:
+        return
+    writer = PlankWriter(DB_NAME, batch_size, max_delay, on_insert=_plank_committed)
+    await writer.start()
+    _writer = writer
+
+
+async def stop_writer():
+    """Flush queued plank writes and return to direct writes."""
+    global _writer
+    if _writer is None:
+        return
+    writer, _writer = _writer, None
+    await writer.stop()
+
+
+@asynccontextmanager
+async def _connect():
+    """Yield a pooled connection, or a one-off one when no pool is open.
+
+    Queued write-behind operations are flushed first so readers always see
+    their own writes. With the query profiler enabled, statements run on the
+    connection are timed.
+    """
+    if _writer is not None:
+        await _writer.flush()
+    if _pool is not None:
+        async with _pool.acquire() as db:
+            yield query_profiler.wrap(db)
+    else:
+        async with aiosqlite.connect(DB_NAME) as db:
+            await configure_connection(db)
+            yield query_profiler.wrap(db)
 
 
 async def init_db():
-    """Create the database file and plank_history table if missing."""
+    """Create the database file or upgrade its schema to the latest version."""
     async with aiosqlite.connect(DB_NAME) as db:
-        await db.execute(
-            """
-            CREATE TABLE IF NOT EXISTS plank_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                username TEXT,
-                duration INTEGER,
-                date TEXT
-            )
-        """
-        )
-        await db.commit()
+        await db.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
+        await run_migrations(db)
 
 
-async def save_plank_result(user_id, username, duration):
-    """Save plank result and return the inserted record ID."""
-    async with aiosqlite.connect(DB_NAME) as db:
-        today = datetime.now().strftime("%Y-%m-%d")
+@timed(DB_QUERY_SECONDS)
+async def save_plank_result(user_id, username, duration, offset=0.0):
+    """Save plank result and return the inserted record ID.
+
+    The row is stored with its UTC timestamp and bucketed into the user's
+    local day, given their UTC offset in hours at the time of writing.
+    Returns once the row is committed and raises if it could not be written.
+    """
+    now = datetime.now(timezone.utc)
+    day = local_epoch_day(now, offset)
+    created_at = int(now.timestamp())
+    if _writer is not None:
+        last_id = await _writer.insert(user_id, username, duration, day, created_at)
+        stats_cache.invalidate_user(user_id)
+        return last_id
+
+    async with _connect() as db:
         cursor = await db.execute(
-            "INSERT INTO plank_history (user_id, username, duration, date) VALUES (?, ?, ?, ?)",
-            (user_id, username, duration, today),
+            "INSERT INTO plank_history (user_id, username, duration, day, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (user_id, username, duration, day, created_at),
         )
         last_id = cursor.lastrowid
+        await add_to_rollup(db, user_id, day, duration)
+        await remember_username(db, user_id, username)
         await db.commit()
-        return last_id
+    stats_cache.invalidate_user(user_id)
+    leaderboard.record(user_id, username, day, duration)
+    return last_id
 
 
+@timed(DB_QUERY_SECONDS)
 async def delete_plank_result(record_id):
     """Delete a plank result by its ID."""
-    async with aiosqlite.connect(DB_NAME) as db:
-        await db.execute("DELETE FROM plank_history WHERE id = ?", (record_id,))
-        await db.commit()
+    if _writer is not None:
+        user_id = await _writer.delete(record_id)
+    else:
+        async with _connect() as db:
+            user_id = await delete_plank_row(db, record_id)
+            await db.commit()
+
+    if user_id is not None:
+        stats_cache.invalidate_user(user_id)
+        leaderboard.invalidate_user(user_id)
+
 
+@timed(DB_QUERY_SECONDS)
+async def get_user_stats(user_id, windows=PLANK_STATS_WINDOWS, offset=0.0):
+    """Return user statistics for each window, in days (7 and 30 by default).
+
+    Windows end at the user's local today (offset in hours from UTC) and
+    read the per-day rollup with an integer range scan, so every window
+    touches at most one row per day. Results are served from stats_cache
+    until the user's history changes.
+    """
+    today = local_epoch_day(datetime.now(timezone.utc), offset)
+    cache_key = ("stats", tuple(windows), today)
+    cached = stats_cache.get(user_id, cache_key)
+    if cached is not None:
+        return cached
+    generation = stats_cache.generation(user_id)
 
-async def get_user_stats(user_id):
-    """Return user statistics for the past 7 and 30 days."""
     stats = {}
-    async with aiosqlite.connect(DB_NAME) as db:
-        for days in [7, 30]:
-            query = f"""
+    async with _connect() as db:
+        for days in windows:
+            async with db.execute(
+                """
                 SELECT
-                    SUM(duration),
-                    COUNT(id),
-                    MAX(duration)
-                FROM plank_history
-                WHERE user_id = ? AND date >= date('now', '-{days} days')
-            """
-            async with db.execute(query, (user_id,)) as cursor:
+                    SUM(total),
+                    SUM(count),
+                    MAX(max)
+                FROM plank_daily_stats
+                WHERE user_id = ? AND day >= ?
+            """,
+                (user_id, today - days),
+            ) as cursor:
                 row = await cursor.fetchone()
 
                 total = row[0] if row[0] else 0
@@ -69,36 +195,230 @@ async def get_user_stats(user_id):
                     "avg": average,
                 }
 
+    stats_cache.put(user_id, cache_key, stats, generation)
     return stats
 
 
-async def get_plank_history(user_id):
-    """Return last 30 plank entries as (date, seconds) tuples."""
-    async with aiosqlite.connect(DB_NAME) as db:
+@timed(DB_QUERY_SECONDS)
+async def get_plank_series(user_id, days=None, weekly=False, offset=0.0):
+    """Return the best and average time per day or week, oldest first.
+
+    Buckets are aggregated in SQL from the daily rollup, so the cost
+    depends on the number of days covered, not attempts. Weeks start on
+    Monday (epoch day 0 was a Thursday, hence the shift by 3).
+
+    Args:
+        days: Number of local days to cover up to today, or None for all.
+        weekly: Aggregate per week instead of per day.
+
+    Returns:
+        (bucket_day, best, average) tuples; bucket_day is the epoch day the
+        bucket starts on.
+    """
+    since = (
+        local_epoch_day(datetime.now(timezone.utc), offset) - days + 1
+        if days is not None
+        else 0
+    )
+    size, shift = (7, 3) if weekly else (1, 0)
+    async with _connect() as db:
         async with db.execute(
             """
-            SELECT date, duration
+            SELECT
+                (day + ?) / ? * ? - ? AS bucket,
+                MAX(max),
+                SUM(total) * 1.0 / SUM(count)
+            FROM plank_daily_stats
+            WHERE user_id = ? AND day >= ?
+            GROUP BY bucket
+            ORDER BY bucket
+        """,
+            (shift, size, size, shift, user_id, since),
+        ) as cursor:
+            return await cursor.fetchall()
+
+
+@timed(DB_QUERY_SECONDS)
+async def get_plank_page(
+    user_id, limit=PLANK_DETAILS_PAGE_SIZE, cursor=None, newer=False
+):
+    """Return one page of the user's attempts, newest first.
+
+    Pages are keyset-paginated on (day, id): `cursor` is the (day, id) of
+    the row the page continues from, and `newer` selects the direction.
+    Each page reads at most limit + 1 rows from idx_plank_history_user_day,
+    however deep into the history it is. Pages are served from stats_cache
+    until the user's history changes, so flipping back and forth or
+    toggling the details view does not query again.
+
+    Returns:
+        (rows, has_more): rows are (day, id, duration) tuples, newest first;
+        has_more tells whether further rows exist in the paging direction.
+    """
+    cache_key = ("page", limit, cursor, newer)
+    cached = stats_cache.get(user_id, cache_key)
+    if cached is not None:
+        return cached
+    generation = stats_cache.generation(user_id)
+
+    if cursor is None:
+        sql = """
+            SELECT day, id, duration
             FROM plank_history
             WHERE user_id = ?
-            ORDER BY date ASC
-            LIMIT 30
-        """,
-            (user_id,),
+            ORDER BY day DESC, id DESC
+            LIMIT ?
+        """
+        params = (user_id, limit + 1)
+    elif newer:
+        sql = """
+            SELECT day, id, duration
+            FROM plank_history
+            WHERE user_id = ? AND (day, id) > (?, ?)
+            ORDER BY day ASC, id ASC
+            LIMIT ?
+        """
+        params = (user_id, *cursor, limit + 1)
+    else:
+        sql = """
+            SELECT day, id, duration
+            FROM plank_history
+            WHERE user_id = ? AND (day, id) < (?, ?)
+            ORDER BY day DESC, id DESC
+            LIMIT ?
+        """
+        params = (user_id, *cursor, limit + 1)
+
+    async with _connect() as db:
+        async with db.execute(sql, params) as cur:
+            rows = await cur.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if newer:
+        rows.reverse()
+    page = (rows, has_more)
+    stats_cache.put(user_id, cache_key, page, generation)
+    return page
+
+
+async def get_leaderboard(period, allowed):
+    """Return the period's top (username, seconds) by "best" and "total".
+
+    Served from the in-memory leaderboard; the database is only read the
+    first time and after a delete. Queued writes are flushed first, since
+    they only reach the leaderboard once committed.
+    """
+    if _writer is not None:
+        await _writer.flush()
+    today = local_epoch_day(datetime.now(timezone.utc), 0)
+    if leaderboard.needs_refresh:
+        await _refresh_leaderboard(today)
+    return leaderboard.top(period, allowed, today)
+
+
+@timed(DB_QUERY_SECONDS)
+async def _refresh_leaderboard(today):
+    async with _connect() as db:
+        await leaderboard.refresh(db, today)
+
+
+@timed(DB_QUERY_SECONDS)
+async def get_graph_file_id(user_id, fingerprint):
+    """Return the Telegram file_id of a graph already sent for this data."""
+    async with _connect() as db:
+        async with db.execute(
+            "SELECT file_id FROM graph_file_cache WHERE user_id = ? AND fingerprint = ?",
+            (user_id, fingerprint),
         ) as cursor:
-            rows = await cursor.fetchall()
-            return rows
+            row = await cursor.fetchone()
+    return row[0] if row else None
 
 
-async def get_plank_details(user_id):
-    """Return all attempts for the last 30 days, newest first."""
-    async with aiosqlite.connect(DB_NAME) as db:
+@timed(DB_QUERY_SECONDS)
+async def save_graph_file_id(user_id, fingerprint, file_id):
+    """Remember the file_id of the latest graph sent to a user."""
+    async with _connect() as db:
+        await db.execute(
+            "INSERT OR REPLACE INTO graph_file_cache (user_id, fingerprint, file_id) "
+            "VALUES (?, ?, ?)",
+            (user_id, fingerprint, file_id),
+        )
+        await db.commit()
+
+
+@timed(DB_QUERY_SECONDS)
+async def get_meta(key):
+    """Return a value from the bot_meta key/value table."""
+    async with _connect() as db:
+        async with db.execute(
+            "SELECT value FROM bot_meta WHERE key = ?", (key,)
+        ) as cursor:
+            row = await cursor.fetchone()
+    return row[0] if row else None
+
+
+@timed(DB_QUERY_SECONDS)
+async def set_meta(key, value):
+    """Store a value in the bot_meta key/value table."""
+    async with _connect() as db:
+        await db.execute(
+            "INSERT OR REPLACE INTO bot_meta (key, value) VALUES (?, ?)", (key, value)
+        )
+        await db.commit()
+
+
+@timed(DB_QUERY_SECONDS)
+async def load_yoga_session(chat_id, message_id):
+    """Return a stored yoga session dict, or None if it was never saved."""
+    async with _connect() as db:
         async with db.execute(
             """
-            SELECT date, duration
-            FROM plank_history
-            WHERE user_id = ? AND date >= date('now', '-30 days')
-            ORDER BY date DESC, id DESC
+            SELECT session_date, going, not_going
+            FROM yoga_sessions
+            WHERE chat_id = ? AND message_id = ?
         """,
-            (user_id,),
+            (chat_id, message_id),
         ) as cursor:
-            return await cursor.fetchall()
+            row = await cursor.fetchone()
+
+    if row is None:
+        return None
+    session_date, going, not_going = row
+    return {
+        "date": session_date,
+        "going": set(json.loads(going)),
+        "not_going": set(json.loads(not_going)),
+    }
+
+
+@timed(DB_QUERY_SECONDS)
+async def save_yoga_session(chat_id, message_id, session):
+    """Insert or update a yoga session and its votes."""
+    async with _connect() as db:
+        await db.execute(
+            """
+            INSERT OR REPLACE INTO yoga_sessions
+                (chat_id, message_id, session_date, going, not_going)
+            VALUES (?, ?, ?, ?, ?)
+        """,
+            (
+                chat_id,
+                message_id,
+                session["date"],
+                json.dumps(sorted(session["going"])),
+                json.dumps(sorted(session["not_going"])),
+            ),
+        )
+        await db.commit()
+
+
+@timed(DB_QUERY_SECONDS)
+async def delete_yoga_session(chat_id, message_id):
+    """Delete a yoga session."""
+    async with _connect() as db:
+        await db.execute(
+            "DELETE FROM yoga_sessions WHERE chat_id = ? AND message_id = ?",
+            (chat_id, message_id),
+        )
+        await db.commit()
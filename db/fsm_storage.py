@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Mapping
+from datetime import date, datetime
+from typing import Any
+
+import aiosqlite
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (
+    BaseStorage,
+    DefaultKeyBuilder,
+    StateType,
+    StorageKey,
+)
+
+from config import FSM_FLUSH_INTERVAL, FSM_STATE_TTL
+from db.pool import configure_connection
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} in FSM data")
+
+
+def _decode(obj: dict):
+    if len(obj) == 1:
+        if "$dt" in obj:
+            return datetime.fromisoformat(obj["$dt"])
+        if "$d" in obj:
+            return date.fromisoformat(obj["$d"])
+    return obj
+
+
+def dumps_data(data: Mapping[str, Any]) -> str:
+    """Serialize FSM data as compact JSON (dates tagged, not pickled)."""
+    return json.dumps(data, default=_encode, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads_data(raw: str) -> dict[str, Any]:
+    """Inverse of dumps_data."""
+    return json.loads(raw, object_hook=_decode)
+
+
+class _Record:
+    __slots__ = ("state", "data", "raw", "touched")
+
+    def __init__(self, state: str | None, data: dict, raw: str, touched: float):
+        self.state = state
+        self.data = data
+        self.raw = raw  # data as serialized by set_data, written by flush()
+        self.touched = touched
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM storage persisted in the bot's SQLite database.
+
+    Reads and writes go to an in-memory record cache. Changed records are
+    written back in one transaction every flush interval, and records idle
+    for longer than the TTL are expired from memory and from the table, so
+    abandoned flows do not accumulate.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = FSM_FLUSH_INTERVAL,
+        ttl: float = FSM_STATE_TTL,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.key_builder = DefaultKeyBuilder(
+            with_bot_id=True, with_business_connection_id=True, with_destiny=True
+        )
+        self._records: dict[str, _Record] = {}
+        self._loading: dict[str, asyncio.Future] = {}
+        self._dirty: set[str] = set()
+        self._conn: aiosqlite.Connection | None = None
+        self._flusher: asyncio.Task | None = None
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._touch(key, record)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return (await self._record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            msg = f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            raise DataNotDictLikeError(msg)
+        # Serialized here so a value JSON cannot hold fails in the handler
+        # that stored it, not later in flush() for every user.
+        raw = dumps_data(data)
+        record = await self._record(key)
+        record.data = data.copy()
+        record.raw = raw
+        self._touch(key, record)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return (await self._record(key)).data.copy()
+
+    async def flush(self):
+        """Write every changed record to the database in one transaction."""
+        if not self._dirty or self._conn is None:
+            return
+        dirty, self._dirty = self._dirty, set()
+
+        upserts, deletes = [], []
+        for k in dirty:
+            record = self._records.get(k)
+            if record is None or (record.state is None and not record.data):
+                deletes.append((k,))
+            else:
+                upserts.append((k, record.state, record.raw, record.touched))
+
+        try:
+            await self._conn.executemany(
+                "DELETE FROM fsm_states WHERE key = ?", deletes
+            )
+            await self._conn.executemany(
+                "INSERT OR REPLACE INTO fsm_states (key, state, data, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                upserts,
+            )
+            await self._conn.commit()
+        except Exception:
+            await self._conn.rollback()
+            self._dirty |= dirty
+            raise
+
+    async def expire(self) -> int:
+        """Drop records idle for longer than the TTL.
+
+        Returns:
+            Number of records removed from memory.
+        """
+        cutoff = time.time() - self.ttl
+        stale = [
+            k
+            for k, record in self._records.items()
+            if record.touched < cutoff and k not in self._dirty
+        ]
+        for k in stale:
+            del self._records[k]
+
+        if self._conn is not None:
+            await self._conn.execute(
+                "DELETE FROM fsm_states WHERE updated_at < ?", (cutoff,)
+            )
+            await self._conn.commit()
+        return len(stale)
+
+    async def close(self) -> None:
+        if self._conn is None:
+            return
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        await self._conn.close()
+        self._conn = None
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            self._conn = await aiosqlite.connect(self.path)
+            await configure_connection(self._conn)
+            self._flusher = asyncio.create_task(self._flush_loop())
+        return self._conn
+
+    async def _record(self, key: StorageKey) -> _Record:
+        k = self.key_builder.build(key)
+        record = self._records.get(k)
+        if record is not None:
+            return record
+
+        # Concurrent first accesses to one key share a single load.
+        loading = self._loading.get(k)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(k))
+            self._loading[k] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(k, None))
+        return await asyncio.shield(loading)
+
+    async def _load(self, k: str) -> _Record:
+        conn = await self._connection()
+        async with conn.execute(
+            "SELECT state, data, updated_at FROM fsm_states WHERE key = ?", (k,)
+        ) as cursor:
+            row = await cursor.fetchone()
+
+        if row is None or row[2] < time.time() - self.ttl:
+            record = _Record(None, {}, "{}", time.time())
+        else:
+            record = _Record(row[0], loads_data(row[1]), row[1], row[2])
+        return self._records.setdefault(k, record)
+
+    def _touch(self, key: StorageKey, record: _Record):
+        record.touched = time.time()
+        self._dirty.add(self.key_builder.build(key))
+
+    async def _flush_loop(self):
+        last_expiry = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - last_expiry > min(self.ttl, 3600):
+                    await self.expire()
+                    last_expiry = time.monotonic()
+            except Exception:
+                logger.exception("Failed to flush FSM states")
@@ -0,0 +1,195 @@
+"""In-memory plank leaderboard kept up to date by saves and deletes."""
+
+import asyncio
+import heapq
+
+import aiosqlite
+
+USERNAMES_SQL = "SELECT user_id, username FROM plank_usernames{where}"
+
+ALL_TIME_SQL = """
+    SELECT user_id, SUM(total), MAX(max)
+    FROM plank_daily_stats
+    {where}
+    GROUP BY user_id
+"""
+
+RECENT_DAYS_SQL = """
+    SELECT user_id, day, total, max
+    FROM plank_daily_stats
+    WHERE day >= ?{and_users}
+"""
+
+
+class _Standing:
+    """One user's all-time totals plus per-day totals for the recent days."""
+
+    __slots__ = ("username", "total", "best", "days")
+
+    def __init__(self, username: str):
+        self.username = username
+        self.total = 0
+        self.best = 0
+        self.days: dict[int, tuple[int, int]] = {}
+
+    def add(self, day: int, duration: int):
+        total, best = self.days.get(day, (0, 0))
+        self.days[day] = (total + duration, max(best, duration))
+        self.total += duration
+        self.best = max(self.best, duration)
+
+    def window(self, since: int | None) -> tuple[int, int]:
+        """Return (total, best) since the given day, or all time for None."""
+        if since is None:
+            return self.total, self.best
+        total = best = 0
+        for day, (day_total, day_best) in self.days.items():
+            if day >= since:
+                total += day_total
+                best = max(best, day_best)
+        return total, best
+
+    def prune(self, since: int):
+        for day in [day for day in self.days if day < since]:
+            del self.days[day]
+
+
+class Leaderboard:
+    """Best hold and total time per user for every leaderboard period.
+
+    Standings are loaded once from the daily rollup and plank_usernames,
+    then updated in place by record(); a delete marks the user stale, and
+    only that user's rows are reloaded on the next refresh(). Reading the
+    top of a period needs no queries. Each user has a generation counter,
+    as in StatsCache, so changes made while a reload was running are
+    reloaded again.
+    """
+
+    def __init__(self, size: int, periods: dict[str, int | None]):
+        self.size = size
+        self.periods = periods
+        self.keep_days = max(days for days in periods.values() if days)
+        self.version = 0
+        self._standings: dict[int, _Standing] | None = None
+        self._stale: set[int] = set()
+        self._generations: dict[int, int] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def needs_refresh(self) -> bool:
+        return self._standings is None or bool(self._stale)
+
+    def _changed(self, user_id: int):
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        self.version += 1
+
+    def record(self, user_id: int, username: str, day: int, duration: int):
+        """Fold a newly saved attempt into the user's standing."""
+        self._changed(user_id)
+        if self._standings is None or user_id in self._stale:
+            return
+        standing = self._standings.setdefault(user_id, _Standing(username))
+        standing.username = username or standing.username
+        standing.add(day, duration)
+
+    def invalidate_user(self, user_id: int):
+        """Reload the user's standing on the next refresh (after a delete)."""
+        self._changed(user_id)
+        if self._standings is not None:
+            self._stale.add(user_id)
+
+    def reset(self):
+        """Forget everything; the next refresh rebuilds from the rollup."""
+        self._standings = None
+        self._stale.clear()
+        self.version += 1
+
+    async def refresh(self, db: aiosqlite.Connection, today: int):
+        """Rebuild from the rollup, or reload just the stale users."""
+        async with self._lock:
+            if self._standings is None:
+                users = None
+            elif self._stale:
+                users = set(self._stale)
+            else:
+                return
+            generations = dict(self._generations)
+
+            loaded = await self._load(db, today - self.keep_days, users)
+            if users is None:
+                self._standings = loaded
+            else:
+                for user_id in users:
+                    self._standings.pop(user_id, None)
+                self._standings.update(loaded)
+                self._stale -= users
+
+            # Users written to while loading may be missing those writes.
+            self._stale.update(
+                user_id
+                for user_id, generation in self._generations.items()
+                if generations.get(user_id) != generation
+            )
+            self.version += 1
+
+    @staticmethod
+    async def _load(
+        db: aiosqlite.Connection, since: int, users: set[int] | None
+    ) -> dict[int, _Standing]:
+        # Reloading stale users only reads their own rollup rows.
+        if users is None:
+            where = and_users = ""
+            params: tuple = ()
+        else:
+            placeholders = ", ".join("?" * len(users))
+            where = f" WHERE user_id IN ({placeholders})"
+            and_users = f" AND user_id IN ({placeholders})"
+            params = tuple(users)
+
+        standings: dict[int, _Standing] = {}
+        async with db.execute(USERNAMES_SQL.format(where=where), params) as cursor:
+            async for user_id, username in cursor:
+                standings[user_id] = _Standing(username)
+        async with db.execute(ALL_TIME_SQL.format(where=where), params) as cursor:
+            async for user_id, total, best in cursor:
+                if user_id in standings:
+                    standings[user_id].total = total
+                    standings[user_id].best = best
+        async with db.execute(
+            RECENT_DAYS_SQL.format(and_users=and_users), (since, *params)
+        ) as cursor:
+            async for user_id, day, total, best in cursor:
+                if user_id in standings:
+                    standings[user_id].days[day] = (total, best)
+        return standings
+
+    def top(self, period: str, allowed, today: int) -> dict[str, list[tuple]]:
+        """Return the top (username, seconds) entries by "best" and "total".
+
+        Only users whose username is in allowed are ranked.
+        """
+        days = self.periods[period]
+        since = today - days if days is not None else None
+        scores = []
+        for standing in (self._standings or {}).values():
+            if standing.username not in allowed:
+                continue
+            standing.prune(today - self.keep_days)
+            total, best = standing.window(since)
+            if total:
+                scores.append((standing.username, total, best))
+
+        return {
+            "best": [
+                (name, best)
+                for name, _, best in heapq.nsmallest(
+                    self.size, scores, key=lambda s: (-s[2], s[0])
+                )
+            ],
+            "total": [
+                (name, total)
+                for name, total, _ in heapq.nsmallest(
+                    self.size, scores, key=lambda s: (-s[1], s[0])
+                )
+            ],
+        }
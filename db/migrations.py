@@ -0,0 +1,259 @@
+import logging
+from datetime import datetime, timezone
+
+import aiosqlite
+
+from db.rollup import (
+    CREATE_ROLLUP_SQL,
+    CREATE_USERNAMES_SQL,
+    backfill_rollup,
+    backfill_usernames,
+)
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = []
+
+
+def migration(version: int, description: str):
+    """Register a schema migration applied in ascending version order."""
+
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+
+    return decorator
+
+
+@migration(1, "create plank_history")
+async def _create_plank_history(db: aiosqlite.Connection):
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS plank_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            username TEXT,
+            duration INTEGER,
+            date TEXT
+        )
+    """
+    )
+
+
+@migration(2, "index plank_history by user and date")
+async def _index_plank_history(db: aiosqlite.Connection):
+    await db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_plank_history_user_date
+        ON plank_history (user_id, date, id)
+    """
+    )
+
+
+@migration(3, "add plank_daily_stats rollup")
+async def _add_daily_rollup(db: aiosqlite.Connection):
+    # Text-date layout of the time; migration 8 rebuilds it by epoch day.
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS plank_daily_stats (
+            user_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            max INTEGER NOT NULL,
+            PRIMARY KEY (user_id, date)
+        ) WITHOUT ROWID
+    """
+    )
+    await db.execute(
+        """
+        INSERT INTO plank_daily_stats (user_id, date, total, count, max)
+        SELECT user_id, date, SUM(duration), COUNT(id), MAX(duration)
+        FROM plank_history
+        WHERE user_id IS NOT NULL AND date IS NOT NULL AND duration IS NOT NULL
+        GROUP BY user_id, date
+    """
+    )
+
+
+@migration(4, "add graph_file_cache")
+async def _add_graph_file_cache(db: aiosqlite.Connection):
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS graph_file_cache (
+            user_id INTEGER PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            file_id TEXT NOT NULL
+        )
+    """
+    )
+
+
+@migration(5, "add bot_meta")
+async def _add_bot_meta(db: aiosqlite.Connection):
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bot_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """
+    )
+
+
+@migration(6, "add yoga_sessions")
+async def _add_yoga_sessions(db: aiosqlite.Connection):
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS yoga_sessions (
+            chat_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            session_date TEXT NOT NULL,
+            going TEXT NOT NULL,
+            not_going TEXT NOT NULL,
+            PRIMARY KEY (chat_id, message_id)
+        )
+    """
+    )
+
+
+@migration(7, "add fsm_states")
+async def _add_fsm_states(db: aiosqlite.Connection):
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS fsm_states (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """
+    )
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_fsm_states_updated_at "
+        "ON fsm_states (updated_at)"
+    )
+
+
+@migration(8, "bucket plank rows by local epoch day")
+async def _bucket_by_epoch_day(db: aiosqlite.Connection):
+    async with db.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'plank_history'"
+    ) as cursor:
+        row = await cursor.fetchone()
+    last_id = row[0] if row else 0
+
+    await db.execute(
+        """
+        CREATE TABLE plank_history_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            username TEXT,
+            duration INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+    """
+    )
+    # Old rows only have the server-local date: keep it as the day and
+    # place the timestamp at noon UTC of that date. Undated rows never
+    # counted in any window and are dropped.
+    await db.execute(
+        """
+        INSERT INTO plank_history_new
+            (id, user_id, username, duration, day, created_at)
+        SELECT
+            id,
+            user_id,
+            username,
+            duration,
+            CAST(julianday(date) - 2440587.5 AS INTEGER),
+            CAST(strftime('%s', date) AS INTEGER) + 43200
+        FROM plank_history
+        WHERE julianday(date) IS NOT NULL
+            AND user_id IS NOT NULL
+            AND duration IS NOT NULL
+    """
+    )
+    await db.execute("DROP TABLE plank_history")
+    await db.execute("ALTER TABLE plank_history_new RENAME TO plank_history")
+    await db.execute(
+        "CREATE INDEX idx_plank_history_user_day ON plank_history (user_id, day, id)"
+    )
+
+    # Never hand out ids of deleted rows again.
+    await db.execute(
+        """
+        UPDATE sqlite_sequence SET seq = MAX(seq, ?)
+        WHERE name = 'plank_history'
+    """,
+        (last_id,),
+    )
+    if last_id:
+        await db.execute(
+            """
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT 'plank_history', ?
+            WHERE NOT EXISTS (
+                SELECT 1 FROM sqlite_sequence WHERE name = 'plank_history'
+            )
+        """,
+            (last_id,),
+        )
+
+    await db.execute("DROP TABLE plank_daily_stats")
+    await db.execute(CREATE_ROLLUP_SQL)
+    await backfill_rollup(db)
+
+
+@migration(9, "add plank_usernames")
+async def _add_plank_usernames(db: aiosqlite.Connection):
+    await db.execute(CREATE_USERNAMES_SQL)
+    await backfill_usernames(db)
+
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    """Return the highest applied migration version, 0 for a fresh file."""
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )
+    """
+    )
+    async with db.execute("SELECT MAX(version) FROM schema_version") as cursor:
+        row = await cursor.fetchone()
+    return row[0] or 0
+
+
+async def run_migrations(db: aiosqlite.Connection) -> int:
+    """Apply pending migrations, each in its own transaction.
+
+    Returns:
+        Schema version after the upgrade.
+    """
+    current = await get_schema_version(db)
+
+    for version, description, func in MIGRATIONS:
+        if version <= current:
+            continue
+
+        logger.info("Applying migration %d: %s", version, description)
+        await db.execute("BEGIN")
+        try:
+            await func(db)
+            await db.execute(
+                "INSERT INTO schema_version (version, description, applied_at) "
+                "VALUES (?, ?, ?)",
+                (version, description, datetime.now(timezone.utc).isoformat()),
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        current = version
+
+    return current
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from config import DB_CACHE_SIZE, DB_SYNCHRONOUS
+
+logger = logging.getLogger(__name__)
+
+
+async def configure_connection(conn: aiosqlite.Connection):
+    """Apply per-connection pragmas (journal mode is set once by init_db)."""
+    await conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+    await conn.execute(f"PRAGMA cache_size = {DB_CACHE_SIZE}")
+
+
+class ConnectionPool:
+    """Small pool of long-lived aiosqlite connections.
+
+    Every aiosqlite connection owns a worker thread and its own prepared
+    statement cache, so reusing connections avoids both the thread start-up
+    and re-parsing the same SQL on every button press.
+    """
+
+    def __init__(self, path: str, size: int, cached_statements: int):
+        self.path = path
+        self.size = size
+        self.cached_statements = cached_statements
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._connections: list[aiosqlite.Connection] = []
+        self._closed = False
+
+    async def open(self):
+        """Open all pooled connections."""
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(
+                self.path, cached_statements=self.cached_statements
+            )
+            await configure_connection(conn)
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
+        logger.info("Opened %d pooled connections to %s", self.size, self.path)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a connection and return it to the pool afterwards."""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                # Never hand out a connection with a half-finished transaction.
+                await conn.rollback()
+            self._idle.put_nowait(conn)
+
+    async def close(self):
+        """Close every pooled connection."""
+        self._closed = True
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+        logger.info("Closed connection pool for %s", self.path)
@@ -0,0 +1,141 @@
+import logging
+import time
+
+import aiosqlite
+
+from config import DB_PROFILE, DB_PROFILE_TOP_N, DB_SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace so one statement always has the same key."""
+    return " ".join(sql.split())
+
+
+class _ProfiledExecute:
+    """Stands in for aiosqlite's execute result: awaitable or `async with`."""
+
+    def __init__(self, profiler, conn: aiosqlite.Connection, sql: str, parameters):
+        self._profiler = profiler
+        self._conn = conn
+        self._sql = sql
+        self._parameters = parameters
+        self._cursor = None
+
+    def __await__(self):
+        return self._execute().__await__()
+
+    async def __aenter__(self):
+        self._cursor = await self._execute()
+        return self._cursor
+
+    async def __aexit__(self, *exc_info):
+        await self._cursor.close()
+
+    async def _execute(self):
+        started = time.perf_counter()
+        cursor = await self._conn.execute(self._sql, self._parameters)
+        elapsed = time.perf_counter() - started
+        await self._profiler.record(self._conn, self._sql, self._parameters, elapsed)
+        return cursor
+
+
+class _ProfiledConnection:
+    """Connection proxy that reports every execute() to the profiler."""
+
+    def __init__(self, profiler, conn: aiosqlite.Connection):
+        self._profiler = profiler
+        self._conn = conn
+
+    def execute(self, sql: str, parameters=None):
+        return _ProfiledExecute(self._profiler, self._conn, sql, parameters)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class QueryProfiler:
+    """Time statements, log slow ones and keep the slowest distinct queries.
+
+    Durations cover execution up to the first row, which for the bot's
+    aggregate and indexed lookups is the whole cost. Each distinct
+    statement's EXPLAIN QUERY PLAN is captured the first time it is seen,
+    so the top list shows whether indexes are used; slow statements are
+    logged together with their parameters and plan.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = DB_SLOW_QUERY_MS,
+        top_n: int = DB_PROFILE_TOP_N,
+        enabled: bool = DB_PROFILE,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.top_n = top_n
+        self.enabled = enabled
+        self._queries: dict[str, dict] = {}
+
+    def wrap(self, conn: aiosqlite.Connection):
+        """Return the connection, profiled if the profiler is enabled."""
+        return _ProfiledConnection(self, conn) if self.enabled else conn
+
+    async def record(self, conn: aiosqlite.Connection, sql: str, parameters, seconds):
+        key = normalize_sql(sql)
+        entry = self._queries.get(key)
+        if entry is None:
+            entry = {
+                "sql": key,
+                "calls": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "params": None,
+                "plan": await self._explain(conn, sql, parameters),
+            }
+            self._queries[key] = entry
+
+        entry["calls"] += 1
+        entry["total"] += seconds
+        if seconds >= entry["max"]:
+            entry["max"] = seconds
+            entry["params"] = parameters
+        self._trim()
+
+        if seconds >= self.threshold:
+            logger.warning(
+                "Slow query (%.1f ms): %s params=%r plan=%s",
+                seconds * 1000,
+                key,
+                parameters,
+                entry["plan"],
+            )
+
+    def top(self) -> list[dict]:
+        """Return the slowest distinct statements, slowest first."""
+        return sorted(self._queries.values(), key=lambda e: e["max"], reverse=True)[
+            : self.top_n
+        ]
+
+    def reset(self):
+        self._queries.clear()
+
+    def _trim(self):
+        # Keep memory bounded: forget the fastest statements first.
+        limit = self.top_n * 10
+        if len(self._queries) > limit:
+            for entry in sorted(self._queries.values(), key=lambda e: e["max"])[
+                : len(self._queries) - limit
+            ]:
+                del self._queries[entry["sql"]]
+
+    @staticmethod
+    async def _explain(conn: aiosqlite.Connection, sql: str, parameters) -> str:
+        try:
+            async with conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters) as cursor:
+                rows = await cursor.fetchall()
+        except aiosqlite.Error as exc:
+            return f"unavailable ({exc})"
+        return "; ".join(row[-1] for row in rows)
+
+
+query_profiler = QueryProfiler()
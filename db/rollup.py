@@ -0,0 +1,186 @@
+"""Per-user, per-day plank aggregates kept in sync with plank_history.
+
+Usage:
+    python -m db.rollup backfill   # rebuild plank_daily_stats from raw rows
+    python -m db.rollup check      # compare plank_daily_stats with raw rows
+"""
+
+import argparse
+import asyncio
+
+import aiosqlite
+
+CREATE_ROLLUP_SQL = """
+    CREATE TABLE IF NOT EXISTS plank_daily_stats (
+        user_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        max INTEGER NOT NULL,
+        PRIMARY KEY (user_id, day)
+    ) WITHOUT ROWID
+"""
+
+# Latest username per user, so per-user readers never group plank_history.
+CREATE_USERNAMES_SQL = """
+    CREATE TABLE IF NOT EXISTS plank_usernames (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL
+    )
+"""
+
+RAW_DAILY_SQL = """
+    SELECT user_id, day, SUM(duration), COUNT(id), MAX(duration)
+    FROM plank_history
+    GROUP BY user_id, day
+"""
+
+
+async def add_to_rollup(db: aiosqlite.Connection, user_id, day, duration):
+    """Fold one new attempt into its day row."""
+    await db.execute(
+        """
+        INSERT INTO plank_daily_stats (user_id, day, total, count, max)
+        VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            total = total + excluded.total,
+            count = count + 1,
+            max = MAX(max, excluded.max)
+    """,
+        (user_id, day, duration, duration),
+    )
+
+
+async def remember_username(db: aiosqlite.Connection, user_id, username):
+    """Record the username a user last saved a result under."""
+    await db.execute(
+        """
+        INSERT INTO plank_usernames (user_id, username) VALUES (?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET username = excluded.username
+    """,
+        (user_id, username or ""),
+    )
+
+
+async def refresh_rollup_day(db: aiosqlite.Connection, user_id, day):
+    """Recompute one day row from raw rows (needed when the max is removed)."""
+    async with db.execute(
+        """
+        SELECT SUM(duration), COUNT(id), MAX(duration)
+        FROM plank_history
+        WHERE user_id = ? AND day = ?
+    """,
+        (user_id, day),
+    ) as cursor:
+        total, count, maximum = await cursor.fetchone()
+
+    if not count:
+        await db.execute(
+            "DELETE FROM plank_daily_stats WHERE user_id = ? AND day = ?",
+            (user_id, day),
+        )
+        return
+
+    await db.execute(
+        """
+        INSERT OR REPLACE INTO plank_daily_stats (user_id, day, total, count, max)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+        (user_id, day, total, count, maximum),
+    )
+
+
+async def delete_plank_row(db: aiosqlite.Connection, record_id) -> int | None:
+    """Delete a raw row and update its day row.
+
+    Returns:
+        User id of the deleted row, or None if no such row existed.
+    """
+    async with db.execute(
+        "SELECT user_id, day FROM plank_history WHERE id = ?", (record_id,)
+    ) as cursor:
+        row = await cursor.fetchone()
+    if row is None:
+        return None
+
+    user_id, day = row
+    await db.execute("DELETE FROM plank_history WHERE id = ?", (record_id,))
+    await refresh_rollup_day(db, user_id, day)
+    return user_id
+
+
+async def backfill_rollup(db: aiosqlite.Connection) -> int:
+    """Rebuild the whole rollup table from plank_history.
+
+    Returns:
+        Number of day rows written.
+    """
+    await db.execute("DELETE FROM plank_daily_stats")
+    cursor = await db.execute(
+        f"INSERT INTO plank_daily_stats (user_id, day, total, count, max) {RAW_DAILY_SQL}"
+    )
+    return cursor.rowcount
+
+
+async def backfill_usernames(db: aiosqlite.Connection) -> int:
+    """Rebuild plank_usernames from each user's latest plank_history row.
+
+    Returns:
+        Number of users written.
+    """
+    await db.execute("DELETE FROM plank_usernames")
+    cursor = await db.execute(
+        """
+        INSERT INTO plank_usernames (user_id, username)
+        SELECT user_id, COALESCE(username, '')
+        FROM plank_history
+        WHERE id IN (SELECT MAX(id) FROM plank_history GROUP BY user_id)
+    """
+    )
+    return cursor.rowcount
+
+
+async def check_rollup(db: aiosqlite.Connection) -> list[tuple]:
+    """Return day rows that differ between the rollup and the raw table."""
+    async with db.execute(
+        f"""
+        SELECT * FROM (
+            {RAW_DAILY_SQL}
+            EXCEPT
+            SELECT user_id, day, total, count, max FROM plank_daily_stats
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT user_id, day, total, count, max FROM plank_daily_stats
+            EXCEPT
+            {RAW_DAILY_SQL}
+        )
+    """
+    ) as cursor:
+        return await cursor.fetchall()
+
+
+async def _main(command: str):
+    from db.database import DB_NAME, init_db
+
+    await init_db()
+    async with aiosqlite.connect(DB_NAME) as db:
+        if command == "backfill":
+            written = await backfill_rollup(db)
+            users = await backfill_usernames(db)
+            await db.commit()
+            print(f"Rebuilt {written} day rows in plank_daily_stats.")
+            print(f"Rebuilt {users} users in plank_usernames.")
+        else:
+            mismatches = await check_rollup(db)
+            for row in mismatches:
+                print("Mismatch:", row)
+            print(f"{len(mismatches)} mismatching day rows.")
+            if mismatches:
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["backfill", "check"])
+    asyncio.run(_main(parser.parse_args().command))
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+from collections.abc import Callable
+
+import aiosqlite
+
+from config import DB_WRITE_RETRIES, DB_WRITE_RETRY_DELAY
+from db.pool import configure_connection
+from db.rollup import add_to_rollup, delete_plank_row, remember_username
+
+logger = logging.getLogger(__name__)
+
+INSERT_PLANK_SQL = (
+    "INSERT INTO plank_history (id, user_id, username, duration, day, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+class PlankWriter:
+    """Write-behind queue that group-commits plank results.
+
+    Inserts get their row id assigned up front, and a single writer task
+    flushes queued operations in one transaction per batch; concurrent
+    callers share one commit. Deletes go through the same queue so they
+    are always applied after the insert they refer to.
+
+    A failed batch is rolled back and retried with exponential backoff.
+    If it keeps failing, its operations are retried one per transaction so
+    a single bad operation cannot take the others down with it; only that
+    one fails, and its caller gets the error. on_insert(user_id, username,
+    duration, day) is called for every insert once it has been committed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int,
+        max_delay: float,
+        on_insert: Callable[[int, str, int, int], None] | None = None,
+        retries: int = DB_WRITE_RETRIES,
+        retry_delay: float = DB_WRITE_RETRY_DELAY,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.on_insert = on_insert
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending: dict[int, tuple] = {}
+        self._next_id = 0
+        self._conn: aiosqlite.Connection | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        """Open the writer connection and start the flush task."""
+        self._conn = await aiosqlite.connect(self.path)
+        await configure_connection(self._conn)
+        async with self._conn.execute(
+            """
+            SELECT MAX(
+                COALESCE((SELECT MAX(id) FROM plank_history), 0),
+                COALESCE(
+                    (SELECT seq FROM sqlite_sequence WHERE name = 'plank_history'),
+                    0
+                )
+            )
+        """
+        ) as cursor:
+            row = await cursor.fetchone()
+        self._next_id = row[0]
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued and close the connection."""
+        if self._task is None:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._conn.close()
+        self._conn = None
+
+    async def insert(self, user_id, username, duration, day, created_at) -> int:
+        """Queue a plank result and return its id once it is committed.
+
+        Raises:
+            The error of the last attempt if the row could not be written.
+        """
+        self._next_id += 1
+        record_id = self._next_id
+        self._pending[record_id] = (user_id, username, duration, day, created_at)
+        done = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(("insert", record_id, done))
+        return await done
+
+    async def delete(self, record_id: int) -> int | None:
+        """Delete a record, dropping it straight from the queue if unflushed.
+
+        Returns:
+            User id of the deleted row, or None if no such row existed.
+        """
+        row = self._pending.pop(record_id, None)
+        if row is not None:
+            return row[0]
+        done = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(("delete", record_id, done))
+        return await done
+
+    async def flush(self):
+        """Wait until every queued operation has been committed."""
+        await self._queue.join()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Queued inserts are taken out of _pending now: a delete() from
+            # here on queues a real delete behind this batch.
+            ops = []
+            for kind, record_id, done in batch:
+                row = None
+                if kind == "insert":
+                    row = self._pending.pop(record_id, None)
+                    if row is None:
+                        # Deleted before it was written.
+                        if not done.done():
+                            done.set_result(record_id)
+                        continue
+                ops.append((kind, record_id, row, done))
+
+            try:
+                await self._write_with_retry(ops)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_with_retry(self, ops: list[tuple]):
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                waiters, inserted = await self._write(ops)
+            except Exception as exc:
+                await self._conn.rollback()
+                error = exc
+                if attempt < self.retries:
+                    logger.warning(
+                        "Failed to flush %d plank operations, retrying in %.2fs: %s",
+                        len(ops),
+                        delay,
+                        exc,
+                    )
+                    await asyncio.sleep(delay)
+                    delay *= 2
+            else:
+                self._committed(waiters, inserted)
+                return
+
+        if len(ops) > 1:
+            for op in ops:
+                await self._write_with_retry([op])
+            return
+
+        kind, record_id, row, done = ops[0]
+        if kind == "insert":
+            logger.error(
+                "Failed to save plank result %d %r after %d attempts: %s",
+                record_id,
+                row,
+                self.retries + 1,
+                error,
+            )
+        if not done.done():
+            done.set_exception(error)
+
+    def _committed(self, waiters: list[tuple], inserted: list[tuple]):
+        for done, result in waiters:
+            if not done.done():
+                done.set_result(result)
+        if self.on_insert is not None:
+            for user_id, username, duration, day, _ in inserted:
+                try:
+                    self.on_insert(user_id, username, duration, day)
+                except Exception:
+                    logger.exception("on_insert failed for user %s", user_id)
+
+    async def _write(self, ops: list[tuple]) -> tuple[list, list]:
+        waiters = []
+        inserted = []
+        for kind, record_id, row, done in ops:
+            if kind == "insert":
+                await self._conn.execute(INSERT_PLANK_SQL, (record_id, *row))
+                await add_to_rollup(self._conn, row[0], row[3], row[2])
+                await remember_username(self._conn, row[0], row[1])
+                inserted.append(row)
+                waiters.append((done, record_id))
+            else:
+                user_id = await delete_plank_row(self._conn, record_id)
+                waiters.append((done, user_id))
+        await self._conn.commit()
+        return waiters, inserted
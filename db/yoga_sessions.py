@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+
+from db.database import delete_yoga_session, load_yoga_session, save_yoga_session
+from services.keyed_lock import KeyedLock
+
+
+def new_session(session_date: str) -> dict:
+    """Return an empty session for a date in YYYY-MM-DD format."""
+    return {"date": session_date, "going": set(), "not_going": set()}
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class YogaSessionStore:
+    """Yoga attendance keyed by (chat_id, message_id), written through to SQLite.
+
+    Sessions stay in memory while they are current and are evicted once their
+    date has passed; a vote on a session that is not in memory (for example
+    after a restart) loads it from the database on demand.
+    """
+
+    def __init__(self):
+        self._hot: dict[tuple[int, int], dict] = {}
+        self._locks = KeyedLock()
+        self._swept_on = _today()
+
+    def locked(self, chat_id: int, message_id: int):
+        """Serialize read-modify-write cycles on one session."""
+        return self._locks((chat_id, message_id))
+
+    async def get(self, chat_id: int, message_id: int) -> dict | None:
+        """Return the session, loading it from the database if needed."""
+        self._evict_expired()
+        key = (chat_id, message_id)
+        session = self._hot.get(key)
+        if session is None:
+            session = await load_yoga_session(chat_id, message_id)
+            if session is not None and not self._expired(session):
+                self._hot[key] = session
+        return session
+
+    async def save(self, chat_id: int, message_id: int, session: dict):
+        """Persist the session and keep it in the hot set."""
+        await save_yoga_session(chat_id, message_id, session)
+        if not self._expired(session):
+            self._hot[(chat_id, message_id)] = session
+
+    async def delete(self, chat_id: int, message_id: int):
+        """Forget the session in memory and in the database."""
+        self._hot.pop((chat_id, message_id), None)
+        await delete_yoga_session(chat_id, message_id)
+
+    def __len__(self) -> int:
+        return len(self._hot)
+
+    def _expired(self, session: dict) -> bool:
+        return session["date"] < self._swept_on
+
+    def _evict_expired(self):
+        today = _today()
+        if today == self._swept_on:
+            return
+        self._swept_on = today
+        self._hot = {
+            key: session
+            for key, session in self._hot.items()
+            if not self._expired(session)
+        }
+
+
+yoga_session_store = YogaSessionStore()
@@ -1,17 +1,23 @@
 import logging
 import random
-from datetime import datetime, timezone
+from datetime import datetime, time, timezone
 
 from aiogram import F, Router, types
 from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.types import BufferedInputFile, Message
 
 from config import (
+    LEADERBOARD_PERIODS,
+    PLANK_GRAPH_DEFAULT_RANGE,
+    PLANK_GRAPH_MAX_POINTS,
+    PLANK_GRAPH_RANGES,
+    PLANK_GRAPH_WEEKLY_AFTER,
     PLANK_INITIAL_SECONDS,
     PLANK_MIN_SECONDS,
     PLANK_MOTIVATION,
+    PLANK_SLIDER_EDIT_INTERVAL,
     PLANK_TEXT_CHALLENGE_TITLE,
     PLANK_TEXT_DELETE_ERROR,
     PLANK_TEXT_DELETE_NONE,
@@ -20,33 +26,49 @@ from config import (
     PLANK_TEXT_GRAPH_CAPTION,
     PLANK_TEXT_GRAPH_ERROR,
     PLANK_TEXT_GRAPH_NO_DATA,
+    PLANK_TEXT_GRAPH_USAGE,
+    PLANK_TEXT_LEADERBOARD_BEST,
+    PLANK_TEXT_LEADERBOARD_EMPTY,
+    PLANK_TEXT_LEADERBOARD_HEADER,
+    PLANK_TEXT_LEADERBOARD_PERIODS,
+    PLANK_TEXT_LEADERBOARD_TOTAL,
+    PLANK_TEXT_LEADERBOARD_USAGE,
     PLANK_TEXT_NO_DATA,
     PLANK_TEXT_PLANK_COMPLETED,
+    PLANK_TEXT_SAVE_ERROR,
     PLANK_TEXT_STATS_HEADER,
     PLANK_TEXT_STATS_MONTH_TITLE,
     PLANK_TEXT_STATS_TAGLINE,
     PLANK_TEXT_STATS_WEEK_TITLE,
-    PLANK_TEXT_TOO_FAST,
     PLANK_TEXT_USERNAME_REQUIRED,
 )
 from db.database import (
     delete_plank_result,
-    get_plank_details,
-    get_plank_history,
+    get_graph_file_id,
+    get_leaderboard,
+    get_plank_page,
+    get_plank_series,
     get_user_stats,
+    leaderboard,
+    save_graph_file_id,
     save_plank_result,
 )
+from services.edit_coalescer import EditCoalescer
+from services.graph_renderer import graph_renderer, points_fingerprint
+from services.keyed_lock import KeyedLock
 from states import PlankState
 from utils import (
     convert_utc_to_local,
+    epoch_day_to_date,
     format_time,
     format_time_compact,
     get_user_offset,
+    local_epoch_day,
+    lttb,
     to_seconds,
     validate_user,
 )
 from views.plank import (
-    generate_progress_graph,
     get_plank_result_keyboard,
     get_plank_slider_keyboard,
     get_plank_stats_details_keyboard,
@@ -57,6 +79,9 @@ logger = logging.getLogger(__name__)
 
 plank_router = Router()
 
+slider_edits = EditCoalescer(PLANK_SLIDER_EDIT_INTERVAL)
+slider_locks = KeyedLock()
+
 
 def _build_stats_text(data: dict) -> str:
     """Format plank statistics for 7 and 30 days."""
@@ -87,8 +112,7 @@ async def cmd_plank(message: Message, state: FSMContext):
         await message.answer(PLANK_TEXT_USERNAME_REQUIRED)
         return
 
-    await state.set_state(PlankState.adjusting)
-    await state.update_data(current_seconds=PLANK_INITIAL_SECONDS)
+    await _start_slider(state)
 
     await message.answer(
         PLANK_TEXT_CHALLENGE_TITLE.format(user_name=message.from_user.first_name),
@@ -116,31 +140,68 @@ async def process_cancel_plank(callback: types.CallbackQuery):
         await callback.answer(PLANK_TEXT_DELETE_ERROR)
 
 
+async def _start_slider(state: FSMContext):
+    """Reset the slider state, dropping versions left by an earlier slider."""
+    async with slider_locks(state.key):
+        await state.set_state(PlankState.adjusting)
+        await state.set_data(
+            {
+                "current_seconds": PLANK_INITIAL_SECONDS,
+                "slider_version": 0,
+                "slider_shown_version": 0,
+            }
+        )
+
+
+async def _push_slider(message: Message, state: FSMContext):
+    """Show the latest slider value unless a newer one is already on screen."""
+    if await state.get_state() != PlankState.adjusting.state:
+        return
+
+    data = await state.get_data()
+    version = data.get("slider_version", 0)
+    if version <= data.get("slider_shown_version", 0):
+        return
+
+    await message.edit_reply_markup(
+        reply_markup=get_plank_slider_keyboard(data["current_seconds"])
+    )
+
+    # The edit may take seconds under rate limiting: the slider could have
+    # been finalized or restarted meanwhile, so re-check before recording.
+    async with slider_locks(state.key):
+        if await state.get_state() != PlankState.adjusting.state:
+            return
+        data = await state.get_data()
+        shown = data.get("slider_shown_version", 0)
+        if shown < version <= data.get("slider_version", 0):
+            await state.update_data(slider_shown_version=version)
+
+
 @plank_router.callback_query(F.data.startswith("plank_adj_"))
 async def process_plank_adjustment(callback: types.CallbackQuery, state: FSMContext):
+    """Apply a slider tap at once and push the keyboard edit at a bounded rate."""
     adjustment = int(callback.data.split("_")[2])
 
-    data = await state.get_data()
-    current_seconds = data.get("current_seconds", PLANK_INITIAL_SECONDS)
-    new_seconds = max(PLANK_MIN_SECONDS, current_seconds + adjustment)
+    async with slider_locks(state.key):
+        data = await state.get_data()
+        current_seconds = data.get("current_seconds", PLANK_INITIAL_SECONDS)
+        new_seconds = max(PLANK_MIN_SECONDS, current_seconds + adjustment)
 
-    if new_seconds == current_seconds:
-        await callback.answer()
-        return
+        if new_seconds == current_seconds:
+            await callback.answer()
+            return
 
-    await state.update_data(current_seconds=new_seconds)
-    try:
-        await callback.message.edit_reply_markup(
-            reply_markup=get_plank_slider_keyboard(new_seconds)
+        await state.update_data(
+            current_seconds=new_seconds,
+            slider_version=data.get("slider_version", 0) + 1,
         )
-        await callback.answer()
-    except TelegramRetryAfter as e:
-        await callback.answer(
-            PLANK_TEXT_TOO_FAST.format(seconds=e.retry_after),
-            show_alert=True,
-        )
-    except TelegramBadRequest:
-        await callback.answer()
+
+    slider_edits.schedule(
+        (callback.message.chat.id, callback.message.message_id),
+        lambda: _push_slider(callback.message, state),
+    )
+    await callback.answer()
 
 
 @plank_router.callback_query(F.data.startswith("plank_final_"))
@@ -154,8 +215,17 @@ async def process_plank_final(
         state: FSM context for the current user.
         plank_users_map: Mapping of usernames to timezone offsets.
     """
-    result = callback.data.split("_")[2]
-    duration_sec = to_seconds(result)
+    slider_edits.cancel((callback.message.chat.id, callback.message.message_id))
+
+    # The slider state includes taps whose keyboard edit was never sent.
+    async with slider_locks(state.key):
+        data = await state.get_data()
+    if "current_seconds" in data:
+        duration_sec = data["current_seconds"]
+        result = format_time(duration_sec)
+    else:
+        result = callback.data.split("_")[2]
+        duration_sec = to_seconds(result)
     username = (
         callback.from_user.username.lower() if callback.from_user.username else ""
     )
@@ -167,7 +237,13 @@ async def process_plank_final(
     user_time = convert_utc_to_local(now_utc, user_offset)
     date_today = user_time.strftime("%d.%m.%Y")
 
-    last_id = await save_plank_result(user_id, username, duration_sec)
+    try:
+        last_id = await save_plank_result(user_id, username, duration_sec, user_offset)
+    except Exception:
+        # The slider stays open, so the user can tap again to retry.
+        logger.exception("Failed to save plank result for user %s", user_id)
+        await callback.answer(PLANK_TEXT_SAVE_ERROR, show_alert=True)
+        return
 
     note = random.choice(PLANK_MOTIVATION)
     final_text = PLANK_TEXT_PLANK_COMPLETED.format(
@@ -177,7 +253,8 @@ async def process_plank_final(
         note=note,
     )
 
-    await state.clear()
+    async with slider_locks(state.key):
+        await state.clear()
     await callback.message.edit_text(
         final_text,
         reply_markup=get_plank_result_keyboard(last_id),
@@ -201,8 +278,7 @@ async def process_back_to_plank(callback: types.CallbackQuery, state: FSMContext
     except (IndexError, ValueError):
         logger.warning("Could not parse record_id for back_to_plank: %s", callback.data)
 
-    await state.set_state(PlankState.adjusting)
-    await state.update_data(current_seconds=PLANK_INITIAL_SECONDS)
+    await _start_slider(state)
 
     await callback.message.edit_text(
         PLANK_TEXT_CHALLENGE_TITLE.format(user_name=callback.from_user.first_name),
@@ -213,10 +289,13 @@ async def process_back_to_plank(callback: types.CallbackQuery, state: FSMContext
 
 
 @plank_router.message(Command("progress"))
-async def show_summary(message: types.Message):
+async def show_summary(message: types.Message, plank_users_map: dict):
     user_id = message.from_user.id
+    username = message.from_user.username.lower() if message.from_user.username else ""
 
-    data = await get_user_stats(user_id)
+    data = await get_user_stats(
+        user_id, offset=get_user_offset(username, plank_users_map)
+    )
 
     text = _build_stats_text(data)
 
@@ -225,36 +304,77 @@ async def show_summary(message: types.Message):
     )
 
 
-@plank_router.callback_query(F.data == "show_stats_details")
-async def process_stats_details(callback: types.CallbackQuery):
+def _build_details_text(rows: list[tuple[int, int, int]]) -> str:
+    """Format one page of (day, id, duration) rows, grouped by day."""
+    history_map: dict[int, list[int]] = {}
+    for day, _, duration in rows:
+        history_map.setdefault(day, []).append(duration)
+
+    details_lines = [
+        f"🔹 <b>{epoch_day_to_date(day):%d.%m.%Y}:</b> "
+        f"{', '.join(format_time_compact(d) for d in durations)}"
+        for day, durations in history_map.items()
+    ]
+    return PLANK_TEXT_DETAILS_HEADER + "\n".join(details_lines) + "\n"
+
+
+async def _show_details_page(
+    callback: types.CallbackQuery,
+    cursor: tuple[int, int] | None = None,
+    newer: bool = False,
+):
+    """Edit the message into the details page continuing from cursor."""
     user_id = callback.from_user.id
-    raw_data = await get_plank_details(user_id)
-    if not raw_data:
+    rows, has_more = await get_plank_page(user_id, cursor=cursor, newer=newer)
+    if not rows and cursor is not None:
+        # The rows around the cursor were deleted: start over from the top.
+        rows, has_more = await get_plank_page(user_id)
+        cursor = None
+    if not rows:
         await callback.answer(PLANK_TEXT_NO_DATA, show_alert=True)
         return
-    history_map: dict[str, list[int]] = {}
-    for date_str, duration in raw_data:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        short_date = date_obj.strftime("%d.%m")
-        history_map.setdefault(short_date, []).append(duration)
 
-    details_lines = [
-        f"🔹 <b>{date}:</b> {', '.join(format_time_compact(d) for d in durations)}"
-        for date, durations in history_map.items()
-    ]
-    details_text = PLANK_TEXT_DETAILS_HEADER + "\n".join(details_lines) + "\n"
+    has_newer = has_more if newer else cursor is not None
+    has_older = has_more if not newer else True
+    keyboard = get_plank_stats_details_keyboard(
+        newer=rows[0][:2] if has_newer else None,
+        older=rows[-1][:2] if has_older else None,
+    )
 
     await callback.message.edit_text(
-        details_text,
-        parse_mode="HTML",
-        reply_markup=get_plank_stats_details_keyboard(),
+        _build_details_text(rows), parse_mode="HTML", reply_markup=keyboard
     )
+    await callback.answer()
+
+
+@plank_router.callback_query(F.data == "show_stats_details")
+async def process_stats_details(callback: types.CallbackQuery):
+    await _show_details_page(callback)
+
+
+@plank_router.callback_query(F.data.startswith("details_"))
+async def process_details_page(callback: types.CallbackQuery):
+    """Turn the details log to the newer or older page."""
+    try:
+        direction, day, record_id = callback.data.split(":")
+        cursor = (int(day), int(record_id))
+    except ValueError:
+        logger.warning("Could not parse details cursor: %s", callback.data)
+        await callback.answer()
+        return
+
+    await _show_details_page(callback, cursor, newer=direction == "details_newer")
 
 
 @plank_router.callback_query(F.data == "hide_stats_details")
-async def process_hide_details(callback: types.CallbackQuery):
+async def process_hide_details(callback: types.CallbackQuery, plank_users_map: dict):
     user_id = callback.from_user.id
-    data = await get_user_stats(user_id)
+    username = (
+        callback.from_user.username.lower() if callback.from_user.username else ""
+    )
+    data = await get_user_stats(
+        user_id, offset=get_user_offset(username, plank_users_map)
+    )
 
     text = _build_stats_text(data)
 
@@ -263,25 +383,127 @@ async def process_hide_details(callback: types.CallbackQuery):
     )
 
 
-@plank_router.message(Command("graph"))
-async def send_graph(message: types.Message):
-    user_id = message.from_user.id
+def _graph_points(series: list[tuple[int, int, float]]) -> list[tuple]:
+    """Turn (bucket_day, best, average) rows into downsampled graph points."""
+    sampled = lttb(series, PLANK_GRAPH_MAX_POINTS)
+    return [
+        (datetime.combine(epoch_day_to_date(day), time.min), best, round(average))
+        for day, best, average in sampled
+    ]
 
-    raw_data = await get_plank_history(user_id)
 
-    if not raw_data:
-        await message.answer(PLANK_TEXT_GRAPH_NO_DATA)
+# period -> ((leaderboard version, day), plank users map, rendered text)
+_leaderboard_texts: dict[str, tuple[tuple, dict, str]] = {}
+
+
+def _build_leaderboard_text(period: str, standings: dict[str, list[tuple]]) -> str:
+    """Format the best-hold and total-time tables of a leaderboard period."""
+    if not standings["total"]:
+        return PLANK_TEXT_LEADERBOARD_EMPTY
+
+    medals = ["🥇", "🥈", "🥉"]
+
+    def table(rows):
+        return "".join(
+            f"{medals[i] if i < len(medals) else f'{i + 1}.'} "
+            f"@{username}: <code>{format_time(seconds)}</code>\n"
+            for i, (username, seconds) in enumerate(rows)
+        )
+
+    return (
+        PLANK_TEXT_LEADERBOARD_HEADER.format(
+            period=PLANK_TEXT_LEADERBOARD_PERIODS[period]
+        )
+        + PLANK_TEXT_LEADERBOARD_BEST
+        + table(standings["best"])
+        + "\n"
+        + PLANK_TEXT_LEADERBOARD_TOTAL
+        + table(standings["total"])
+    )
+
+
+@plank_router.message(Command("leaderboard"))
+async def show_leaderboard(
+    message: types.Message, command: CommandObject, plank_users_map: dict
+):
+    """Show the group's plank leaderboard for the week, month or all time.
+
+    The text is rendered once per change of the standings or the plank
+    guest list, so repeated requests reuse it without touching the database.
+    """
+    period = (command.args or "week").strip().lower()
+    if period not in LEADERBOARD_PERIODS:
+        await message.answer(PLANK_TEXT_LEADERBOARD_USAGE)
         return
 
-    points = [
-        (datetime.strptime(date_str, "%Y-%m-%d"), duration)
-        for date_str, duration in raw_data
-    ]
+    today = local_epoch_day(datetime.now(timezone.utc), 0)
+    cached = _leaderboard_texts.get(period)
+    if (
+        cached is not None
+        and not leaderboard.needs_refresh
+        and cached[0] == (leaderboard.version, today)
+        and cached[1] is plank_users_map
+    ):
+        text = cached[2]
+    else:
+        standings = await get_leaderboard(period, plank_users_map)
+        text = _build_leaderboard_text(period, standings)
+        _leaderboard_texts[period] = (
+            (leaderboard.version, today),
+            plank_users_map,
+            text,
+        )
+
+    await message.answer(text, parse_mode="HTML")
+
 
-    photo_file = generate_progress_graph(points)
+@plank_router.message(Command("graph"))
+async def send_graph(
+    message: types.Message, command: CommandObject, plank_users_map: dict
+):
+    """Send the progress graph for the last 30, 90 or 365 days, or all time.
+
+    Longer ranges are plotted per week; either way the series is reduced to
+    PLANK_GRAPH_MAX_POINTS points, so render time and PNG size do not grow
+    with the user's history.
+    """
+    user_id = message.from_user.id
+    range_arg = (command.args or PLANK_GRAPH_DEFAULT_RANGE).strip().lower()
+    if range_arg not in PLANK_GRAPH_RANGES:
+        await message.answer(PLANK_TEXT_GRAPH_USAGE)
+        return
+    days = PLANK_GRAPH_RANGES[range_arg]
+    username = message.from_user.username.lower() if message.from_user.username else ""
+
+    series = await get_plank_series(
+        user_id,
+        days,
+        weekly=days is None or days > PLANK_GRAPH_WEEKLY_AFTER,
+        offset=get_user_offset(username, plank_users_map),
+    )
+
+    if not series:
+        await message.answer(PLANK_TEXT_GRAPH_NO_DATA)
+        return
 
-    if photo_file:
-        photo = BufferedInputFile(photo_file.read(), filename="progress.png")
-        await message.answer_photo(photo, caption=PLANK_TEXT_GRAPH_CAPTION)
+    points = _graph_points(series)
+
+    # Resend an unchanged graph by file_id: no render and no upload.
+    fingerprint = points_fingerprint(points, range_arg)
+    file_id = await get_graph_file_id(user_id, fingerprint)
+    if file_id:
+        try:
+            await message.answer_photo(file_id, caption=PLANK_TEXT_GRAPH_CAPTION)
+            return
+        except TelegramBadRequest as exc:
+            logger.debug("Cached graph file_id rejected for %s: %s", user_id, exc)
+
+    png = await graph_renderer.render(user_id, points)
+
+    if png:
+        photo = BufferedInputFile(png, filename="progress.png")
+        sent = await message.answer_photo(photo, caption=PLANK_TEXT_GRAPH_CAPTION)
+        if sent.photo:
+            await save_graph_file_id(user_id, fingerprint, sent.photo[-1].file_id)
     else:
         await message.answer(PLANK_TEXT_GRAPH_ERROR)
@@ -23,19 +23,23 @@ from config import (
     YOGA_TEXT_STATUS_SECTION,
     YOGA_TEXT_SESSION_CONFIRMED,
     YOGA_TEXT_SESSION_NEED_MORE,
+    YOGA_EDIT_INTERVAL,
 )
+from db.yoga_sessions import new_session, yoga_session_store
+from services.edit_coalescer import EditCoalescer
 from views.yoga import (
     get_week_keyboard,
     get_yoga_time_keyboard,
     get_yoga_attendance_keyboard,
+    yoga_slot_times,
 )
-from utils import get_user_offset, convert_utc_to_local, validate_user, escape_markdown
+from utils import get_user_offset, validate_user
 
 logger = logging.getLogger(__name__)
 
 yoga_router = Router()
 
-yoga_sessions = {}
+session_edits = EditCoalescer(YOGA_EDIT_INTERVAL)
 
 
 @yoga_router.message(Command("yoga"))
@@ -70,7 +74,7 @@ async def process_day_selection(
     date_str = callback.data.split("_")[1]
     selected_date = datetime.strptime(date_str, "%Y-%m-%d")
 
-    await state.update_data(chosen_date=selected_date)
+    await state.update_data(chosen_date=date_str)
     username = (
         callback.from_user.username.lower() if callback.from_user.username else ""
     )
@@ -107,23 +111,24 @@ async def process_time_button(
     if not chosen_date:
         return
 
-    dt_utc = chosen_date.replace(hour=utc_h, minute=utc_m)
-
-    times_list = "\n".join(
-        f"📍 {escape_markdown(user_login)}: "
-        f"{convert_utc_to_local(dt_utc, float(user_offset)).strftime('%H:%M')}"
-        for user_login, user_offset in yoga_users_map.items()
+    dt_utc = datetime.strptime(chosen_date, "%Y-%m-%d").replace(
+        hour=utc_h, minute=utc_m
     )
 
     await callback.message.edit_text(
         YOGA_TEXT_SESSION_SUMMARY.format(
             date=dt_utc.strftime("%d.%m"),
             utc_time=utc_time_str,
-            times=times_list,
+            times=yoga_slot_times.times(utc_time_str, yoga_users_map),
         ),
         reply_markup=get_yoga_attendance_keyboard(),
         parse_mode="Markdown",
     )
+    await yoga_session_store.save(
+        callback.message.chat.id,
+        callback.message.message_id,
+        new_session(dt_utc.strftime("%Y-%m-%d")),
+    )
 
 
 @yoga_router.callback_query(F.data == "cancel_session")
@@ -131,8 +136,9 @@ async def process_cancel_session(callback: types.CallbackQuery, state: FSMContex
     await state.clear()
     try:
         await callback.message.delete()
-        if callback.message.message_id in yoga_sessions:
-            del yoga_sessions[callback.message.message_id]
+        await yoga_session_store.delete(
+            callback.message.chat.id, callback.message.message_id
+        )
     except (TelegramBadRequest, TelegramRetryAfter) as exc:
         logger.debug("Failed to delete session message: %s", exc)
         await callback.answer(YOGA_TEXT_MESSAGE_DELETED)
@@ -142,36 +148,41 @@ async def process_cancel_session(callback: types.CallbackQuery, state: FSMContex
 
 @yoga_router.callback_query(F.data.in_(["approve", "reject"]))
 async def handle_attendance(callback: types.CallbackQuery):
+    chat_id = callback.message.chat.id
     msg_id = callback.message.message_id
     user_name = callback.from_user.first_name
     action = callback.data
 
-    if msg_id not in yoga_sessions:
-        yoga_sessions[msg_id] = {"going": set(), "not_going": set()}
-
-    session = yoga_sessions[msg_id]
-    if action == "approve":
-        if user_name in session["going"]:
-            await callback.answer(YOGA_TEXT_ALREADY_GOING)
-            return
-        session["going"].add(user_name)
-        session["not_going"].discard(user_name)
-    else:
-        if user_name in session["not_going"]:
-            await callback.answer(YOGA_TEXT_ALREADY_NOT_GOING)
-            return
-        session["not_going"].add(user_name)
-        session["going"].discard(user_name)
-
-    await update_session_message(callback)
+    async with yoga_session_store.locked(chat_id, msg_id):
+        session = await yoga_session_store.get(chat_id, msg_id)
+        if session is None:
+            # Summary posted before sessions were persisted: assume it is current.
+            session = new_session(datetime.now().strftime("%Y-%m-%d"))
+
+        if action == "approve":
+            if user_name in session["going"]:
+                await callback.answer(YOGA_TEXT_ALREADY_GOING)
+                return
+            session["going"].add(user_name)
+            session["not_going"].discard(user_name)
+        else:
+            if user_name in session["not_going"]:
+                await callback.answer(YOGA_TEXT_ALREADY_NOT_GOING)
+                return
+            session["not_going"].add(user_name)
+            session["going"].discard(user_name)
+
+        await yoga_session_store.save(chat_id, msg_id, session)
+
+    # Bursts of votes collapse into one edit per interval showing the latest lists.
+    session_edits.schedule(
+        (chat_id, msg_id), lambda: update_session_message(callback, session)
+    )
     await callback.answer()
 
 
-async def update_session_message(callback: types.CallbackQuery):
-    # TODO: Persist session state instead of keeping it only in memory.
-    msg_id = callback.message.message_id
-    session = yoga_sessions.get(msg_id, {"going": set(), "not_going": set()})
-
+async def update_session_message(callback: types.CallbackQuery, session: dict):
+    """Re-render the session summary with the current attendance lists."""
     count_going = len(session["going"])
     going_str = ", ".join(session["going"]) if session["going"] else "..."
     not_going_str = ", ".join(session["not_going"]) if session["not_going"] else "..."
@@ -1,19 +1,51 @@
 import asyncio
+import hashlib
 import logging
 import os
 import json
+from contextlib import suppress
 from dotenv import load_dotenv
-from db.database import init_db
-from config import BOT_COMMANDS, LOG_LEVEL, LOG_FORMAT
+from db.database import (
+    close_pool,
+    get_meta,
+    init_db,
+    open_pool,
+    set_meta,
+    start_writer,
+    stats_cache,
+    stop_writer,
+)
+from db.fsm_storage import SQLiteStorage
+from db.profiler import query_profiler
+from config import (
+    BOT_COMMANDS,
+    DB_NAME,
+    DB_WRITE_BEHIND,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    METRICS_ENABLED,
+    METRICS_HOST,
+    METRICS_PORT,
+    WEBHOOK_HOST,
+    WEBHOOK_MAX_CONCURRENCY,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+)
 
 from aiogram import Bot, Dispatcher
-from aiogram.filters import Command
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.filters import Command, CommandObject
 from aiogram.types import Message, BotCommand
+from aiohttp import web
 
-from middlewares import AccessMiddleware
+from middlewares import AccessMiddleware, MetricsMiddleware
+from services.graph_renderer import graph_renderer
+from services.metrics import start_metrics_server
+from services.rate_limiter import rate_limiter
+from services.user_registry import FEATURES, user_registry
+from services.webhook import build_webhook_app
 from handlers.yoga import yoga_router
 from handlers.plank import plank_router
+from views.yoga import yoga_slot_times
 from utils import validate_user
 
 load_dotenv()
@@ -21,41 +53,43 @@ API_TOKEN = os.getenv("BOT_TOKEN")
 if not API_TOKEN:
     raise ValueError("BOT_TOKEN not found!")
 
-
-def load_users(filename: str) -> dict:
-    """Load timezone offsets from JSON file or return empty dict on error."""
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError, IOError) as e:
-        logger.warning("Failed to load %s: %s", filename, e)
-    return {}
-
-
-YOGA_USERS = load_users("users_yoga.json")
-PLANK_USERS = load_users("users_plank.json")
-
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+if BOT_MODE == "webhook" and not (WEBHOOK_URL and WEBHOOK_SECRET):
+    raise ValueError("Webhook mode needs WEBHOOK_URL and WEBHOOK_SECRET!")
 
 logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
-bot = Bot(token=API_TOKEN)
-dp = Dispatcher(storage=MemoryStorage())
 
+user_registry.on_change(yoga_slot_times.on_registry_change)
+user_registry.load()
 
-dp.update.outer_middleware(
-    AccessMiddleware(yoga_users=YOGA_USERS, plank_users=PLANK_USERS)
-)
+
+bot = Bot(token=API_TOKEN)
+bot.session.middleware(rate_limiter)
+dp = Dispatcher(storage=SQLiteStorage(DB_NAME))
 
 
-dp["yoga_users_map"] = YOGA_USERS
-dp["plank_users_map"] = PLANK_USERS
+metrics_middleware = MetricsMiddleware()
+dp.update.outer_middleware(metrics_middleware)
+dp.update.outer_middleware(AccessMiddleware(user_registry))
+dp.message.middleware(metrics_middleware.label_handler)
+dp.callback_query.middleware(metrics_middleware.label_handler)
 
 
 dp.include_router(yoga_router)
 dp.include_router(plank_router)
 
 
+def is_admin(message: Message, yoga_users_map: dict) -> bool:
+    """Return True if the sender is the first user in users_yoga.json."""
+    user_keys = list(yoga_users_map.keys())
+    admin_username = user_keys[0] if user_keys else ""
+    return message.from_user.username.lower() == admin_username
+
+
 @dp.message(Command("shutdown"))
 async def cmd_shutdown(message: Message, yoga_users_map: dict):
     """Shut down the bot if the caller is the configured admin."""
@@ -63,28 +97,206 @@ async def cmd_shutdown(message: Message, yoga_users_map: dict):
         await message.answer("❌ Set a Username in Telegram!")
         return
 
-    user_keys = list(yoga_users_map.keys())
-    admin_username = user_keys[0] if user_keys else ""
-
-    if message.from_user.username.lower() == admin_username:
+    if is_admin(message, yoga_users_map):
         await message.answer("🛑 Bot shut down.")
         logger.info("Bot shutdown initiated by admin: %s", message.from_user.username)
         await bot.session.close()
-        await dp.stop_polling()
+        graph_renderer.stop()
+        await dp.storage.close()
+        await stop_writer()
+        await close_pool()
+        if BOT_MODE == "polling":
+            await dp.stop_polling()
         os._exit(0)
     else:
         await message.answer("🚫 You don't have permission to shut down the bot.")
 
 
-async def main():
-    """Start the bot and run the polling loop."""
-    await init_db()
+@dp.message(Command("cachestats"))
+async def cmd_cache_stats(message: Message, yoga_users_map: dict):
+    """Show stats cache hit/miss counters to the admin."""
+    if not validate_user(message) or not is_admin(message, yoga_users_map):
+        return
+
+    snapshot = stats_cache.snapshot()
+    await message.answer(
+        f"🗄 Stats cache: {snapshot['hits']} hits, {snapshot['misses']} misses "
+        f"({snapshot['hit_rate']:.0%}), {snapshot['entries']} entries, "
+        f"{snapshot['bytes'] // 1024} KiB"
+    )
+
+
+@dp.message(Command("limiterstats"))
+async def cmd_limiter_stats(message: Message, yoga_users_map: dict):
+    """Show outbound rate limiter queue and wait-time counters to the admin."""
+    if not validate_user(message) or not is_admin(message, yoga_users_map):
+        return
+
+    snapshot = rate_limiter.snapshot()
+    await message.answer(
+        f"🚦 Rate limiter: {snapshot['queue_depth']} queued, "
+        f"{snapshot['delayed_calls']} delayed calls, "
+        f"{snapshot['total_wait_seconds']:.1f}s total wait "
+        f"(max {snapshot['max_wait_seconds']:.1f}s), "
+        f"{snapshot['retries']} retry-after retries"
+    )
+
+
+@dp.message(Command("slowqueries"))
+async def cmd_slow_queries(
+    message: Message, command: CommandObject, yoga_users_map: dict
+):
+    """Control the query profiler or show the slowest queries to the admin.
+
+    Usage: /slowqueries [on|off|reset]
+    """
+    if not validate_user(message) or not is_admin(message, yoga_users_map):
+        return
+
+    action = (command.args or "").strip().lower()
+    if action in ("on", "off"):
+        query_profiler.enabled = action == "on"
+        await message.answer(f"🔬 Query profiler {action}.")
+        return
+    if action == "reset":
+        query_profiler.reset()
+        await message.answer("🔬 Query profile cleared.")
+        return
+
+    top = query_profiler.top()
+    if not top:
+        state = "on" if query_profiler.enabled else "off (/slowqueries on)"
+        await message.answer(f"🔬 No queries profiled yet, profiler is {state}.")
+        return
+
+    lines = [f"🔬 Slowest {len(top)} queries:"]
+    for entry in top:
+        lines.append(
+            f"\n{entry['max'] * 1000:.1f} ms max, "
+            f"{entry['total'] / entry['calls'] * 1000:.1f} ms avg, "
+            f"{entry['calls']} calls, params={entry['params']!r}\n"
+            f"{entry['sql'][:300]}\nplan: {entry['plan']}"
+        )
+    await message.answer("\n".join(lines)[:4096])
+
+
+def _parse_features(value: str) -> tuple[str, ...]:
+    """Map 'yoga', 'plank' or 'both' to registry feature names."""
+    if value == "both":
+        return FEATURES
+    if value in FEATURES:
+        return (value,)
+    raise ValueError(f"unknown list {value!r}")
+
+
+@dp.message(Command("adduser"))
+async def cmd_add_user(message: Message, command: CommandObject, yoga_users_map: dict):
+    """Add or update a guest: /adduser yoga|plank|both <username> <utc offset>."""
+    if not validate_user(message) or not is_admin(message, yoga_users_map):
+        return
+
+    try:
+        target, username, offset = (command.args or "").split()
+        for feature in _parse_features(target):
+            user_registry.set_user(feature, username, float(offset))
+    except ValueError as e:
+        await message.answer(
+            f"Usage: /adduser yoga|plank|both <username> <utc offset>\n({e})"
+        )
+        return
+
+    await message.answer(f"✅ {username} added to {target} (UTC{float(offset):+g}).")
+
+
+@dp.message(Command("removeuser"))
+async def cmd_remove_user(
+    message: Message, command: CommandObject, yoga_users_map: dict
+):
+    """Remove a guest: /removeuser yoga|plank|both <username>."""
+    if not validate_user(message) or not is_admin(message, yoga_users_map):
+        return
+
+    try:
+        target, username = (command.args or "").split()
+        features = _parse_features(target)
+    except ValueError as e:
+        await message.answer(f"Usage: /removeuser yoga|plank|both <username>\n({e})")
+        return
+
+    if "yoga" in features and username.lstrip("@").lower() == user_registry.admin():
+        await message.answer("🚫 The admin cannot be removed from the yoga list.")
+        return
+
+    removed = [f for f in features if user_registry.remove_user(f, username)]
+    if removed:
+        await message.answer(f"🗑 {username} removed from {', '.join(removed)}.")
+    else:
+        await message.answer(f"{username} is not on the {target} list.")
+
+
+async def sync_bot_commands():
+    """Publish BOT_COMMANDS unless the same list was already set on a previous boot."""
+    commands_hash = hashlib.sha1(json.dumps(BOT_COMMANDS).encode()).hexdigest()
+    if await get_meta("bot_commands_hash") == commands_hash:
+        logger.info("Bot commands unchanged, skipping set_my_commands")
+        return
 
     commands = [BotCommand(command=cmd, description=desc) for cmd, desc in BOT_COMMANDS]
     await bot.set_my_commands(commands)
+    await set_meta("bot_commands_hash", commands_hash)
+
+
+async def run_webhook():
+    """Serve updates through the embedded aiohttp server until cancelled."""
+    app = build_webhook_app(dp, bot, WEBHOOK_SECRET)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+
+    await bot.set_webhook(
+        f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
+        max_connections=WEBHOOK_MAX_CONCURRENCY,
+    )
+    logger.info("Listening for webhook updates on port %d", WEBHOOK_PORT)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def main():
+    """Start the bot and run the polling loop or the webhook server."""
+    await init_db()
+    await open_pool()
+    if DB_WRITE_BEHIND:
+        await start_writer()
+    graph_renderer.start()
+    registry_watcher = asyncio.create_task(user_registry.watch())
+    metrics_server = None
+    if METRICS_ENABLED:
+        metrics_server = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+
+    await sync_bot_commands()
 
     logger.info("🚀 Bot started and Database initialized!")
-    await dp.start_polling(bot)
+    try:
+        if BOT_MODE == "webhook":
+            await run_webhook()
+        else:
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    finally:
+        registry_watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await registry_watcher
+        if metrics_server is not None:
+            await metrics_server.cleanup()
+        graph_renderer.stop()
+        await dp.storage.close()
+        await stop_writer()
+        await close_pool()
 
 
 if __name__ == "__main__":
@@ -1,17 +1,31 @@
 import logging
+import time
 
 from aiogram import types
+from aiogram.dispatcher.event.bases import UNHANDLED
 from aiogram.dispatcher.middlewares.base import BaseMiddleware
 from aiogram.types import TelegramObject
 
+from services.metrics import (
+    HANDLER_ERRORS,
+    HANDLER_SECONDS,
+    REJECTED_UPDATES,
+    REJECTED_USERS,
+)
+
 logger = logging.getLogger(__name__)
 
 
 class AccessMiddleware(BaseMiddleware):
-    def __init__(self, yoga_users: dict, plank_users: dict):
+    """Reject users who are not on any guest list of the registry.
+
+    Also injects the current `yoga_users_map` and `plank_users_map`, so
+    handlers always see the latest reloaded offsets.
+    """
+
+    def __init__(self, registry):
         super().__init__()
-        self.yoga_users = yoga_users
-        self.plank_users = plank_users
+        self.registry = registry
 
     async def __call__(self, handler, event: TelegramObject, data):
         user = data.get("event_from_user")
@@ -30,7 +44,7 @@ class AccessMiddleware(BaseMiddleware):
 
         username = user.username.lower()
 
-        if username not in self.yoga_users and username not in self.plank_users:
+        if not self.registry.is_allowed(username):
             if isinstance(event, types.Message):
                 await event.answer("🚫 Access denied. You are not on the guest list.")
             elif isinstance(event, types.CallbackQuery):
@@ -39,4 +53,52 @@ class AccessMiddleware(BaseMiddleware):
                 )
             return
 
+        data["yoga_users_map"] = self.registry.yoga
+        data["plank_users_map"] = self.registry.plank
         return await handler(event, data)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Record update latency and errors per handler, and access rejections.
+
+    Register it as an outer update middleware before AccessMiddleware, and
+    `label_handler` as an inner message and callback middleware: the outer
+    part only sees the update, the inner part tells it which handler ran.
+    An update that reached no handler and was not UNHANDLED was stopped by
+    the access check.
+    """
+
+    MAX_TRACKED_USERS = 10_000
+
+    def __init__(self):
+        super().__init__()
+        self._rejected_users: set[int] = set()
+
+    async def __call__(self, handler, event: TelegramObject, data):
+        probe = data["metrics_probe"] = {}
+        started = time.perf_counter()
+        try:
+            result = await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=probe.get("handler", "unknown"))
+            raise
+        finally:
+            name = probe.get("handler")
+            if name:
+                HANDLER_SECONDS.observe(time.perf_counter() - started, handler=name)
+
+        if "handler" not in probe and result is not UNHANDLED:
+            self._record_rejection(data.get("event_from_user"))
+        return result
+
+    async def label_handler(self, handler, event: TelegramObject, data):
+        probe = data.get("metrics_probe")
+        if probe is not None:
+            probe["handler"] = data["handler"].callback.__name__
+        return await handler(event, data)
+
+    def _record_rejection(self, user):
+        REJECTED_UPDATES.inc()
+        if user and len(self._rejected_users) < self.MAX_TRACKED_USERS:
+            self._rejected_users.add(user.id)
+            REJECTED_USERS.set(len(self._rejected_users))
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+
+from aiogram.exceptions import TelegramBadRequest
+
+logger = logging.getLogger(__name__)
+
+
+class EditCoalescer:
+    """Send at most one message edit per key per interval.
+
+    The first edit for a key goes out immediately. Edits scheduled while the
+    key is cooling down replace each other, and only the latest one is sent
+    when the interval ends, so bursts collapse into two edits at most.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._latest: dict[Hashable, Callable[[], Awaitable]] = {}
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    def schedule(self, key: Hashable, edit: Callable[[], Awaitable]):
+        """Queue an edit, replacing any not-yet-sent edit for the same key."""
+        self._latest[key] = edit
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    def cancel(self, key: Hashable):
+        """Drop a queued edit that has not been sent yet."""
+        self._latest.pop(key, None)
+
+    def pending(self, key: Hashable) -> bool:
+        """Return True while an edit for the key is queued or cooling down."""
+        return key in self._tasks
+
+    async def _run(self, key: Hashable):
+        try:
+            while key in self._latest:
+                edit = self._latest.pop(key)
+                try:
+                    await edit()
+                except TelegramBadRequest as exc:
+                    # Usually "message is not modified" or a deleted message.
+                    logger.debug("Skipped coalesced edit for %s: %s", key, exc)
+                except Exception:
+                    logger.exception("Coalesced edit for %s failed", key)
+                await asyncio.sleep(self.interval)
+        finally:
+            self._tasks.pop(key, None)
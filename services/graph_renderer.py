@@ -0,0 +1,93 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from config import GRAPH_RENDER_TIMEOUT, GRAPH_RENDER_WORKERS
+from services.metrics import GRAPH_RENDER_SECONDS
+from views.plank import render_progress_png
+
+logger = logging.getLogger(__name__)
+
+
+def points_fingerprint(points: list[tuple], scope: str = "") -> str:
+    """Return a short stable hash of graph points and the range they cover."""
+    digest = hashlib.sha1(f"{scope}|".encode())
+    for timestamp, *values in points:
+        digest.update(f"{timestamp.isoformat()}={values};".encode())
+    return digest.hexdigest()
+
+
+class GraphRenderer:
+    """Render progress graphs in a bounded process pool.
+
+    Matplotlib is CPU-bound and would otherwise block polling for every
+    other user. Concurrent requests for the same user and data share a
+    single render, and a render that exceeds the timeout yields None so
+    the handler can fall back to an error message.
+    """
+
+    def __init__(self, workers: int, timeout: float, render_func=render_progress_png):
+        self.workers = workers
+        self.timeout = timeout
+        self.render_func = render_func
+        self._executor: Executor | None = None
+        self._slots = asyncio.Semaphore(workers)
+        self._inflight: dict[tuple, asyncio.Future] = {}
+
+    def start(self):
+        """Start worker processes (spawned, so no event-loop state leaks in)."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def stop(self):
+        """Shut down worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(self, user_id: int, points: list[tuple]):
+        """Return PNG bytes for the points, or None on error or timeout.
+
+        Without start() the render runs in the default thread pool instead.
+        """
+        key = (user_id, points_fingerprint(points))
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._render(points))
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Graph render for user %s timed out", user_id)
+        except Exception:
+            logger.exception("Graph render for user %s failed", user_id)
+        return None
+
+    def _forget(self, key: tuple, future: asyncio.Future):
+        self._inflight.pop(key, None)
+        if not future.cancelled():
+            # Mark the exception as retrieved even if every caller timed out.
+            future.exception()
+
+    async def _render(self, points):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            # Timed here: generate_progress_graph runs in a worker process.
+            started = time.perf_counter()
+            try:
+                return await loop.run_in_executor(
+                    self._executor, self.render_func, points
+                )
+            finally:
+                GRAPH_RENDER_SECONDS.observe(time.perf_counter() - started)
+
+
+graph_renderer = GraphRenderer(GRAPH_RENDER_WORKERS, GRAPH_RENDER_TIMEOUT)
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+from config import (
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_GROUP_RATE,
+    TELEGRAM_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_IDLE_BUCKETS = 10_000
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of rejecting calls.
+
+    A call that finds the bucket empty still takes a token (driving the
+    balance negative) and is told how long to wait, so queued calls are
+    served in arrival order at exactly the configured rate.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Take one token and return the seconds to wait before using it."""
+        refill = max(0.0, now - self.updated) * self.rate
+        self.tokens = min(self.capacity, self.tokens + refill)
+        self.updated = max(self.updated, now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def idle(self, now: float) -> bool:
+        """Return True if the bucket would be full again by now."""
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class RateLimiter(BaseRequestMiddleware):
+    """Bot session middleware enforcing Telegram's outbound limits.
+
+    Methods addressed to a chat (sends, edits, deletes) are throttled by a
+    global bucket plus one bucket per chat, with a slower rate for groups.
+    Calls over the limit wait for their turn, and TelegramRetryAfter is
+    honoured by sleeping and retrying instead of failing the handler.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        group_rate: float = TELEGRAM_GROUP_RATE,
+        chat_burst: float = TELEGRAM_CHAT_BURST,
+        max_retries: int = TELEGRAM_MAX_RETRIES,
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._chat_buckets: dict[int | str, TokenBucket] = {}
+
+        self.queue_depth = 0
+        self.delayed_calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.retries = 0
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is not None:
+            await self._wait_for_turn(chat_id)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                logger.warning(
+                    "Flood control on %s, retrying in %ss",
+                    type(method).__name__,
+                    exc.retry_after,
+                )
+                await asyncio.sleep(exc.retry_after)
+
+    def snapshot(self) -> dict:
+        """Return queue depth and wait-time counters."""
+        return {
+            "queue_depth": self.queue_depth,
+            "delayed_calls": self.delayed_calls,
+            "total_wait_seconds": self.total_wait,
+            "max_wait_seconds": self.max_wait,
+            "retries": self.retries,
+            "chat_buckets": len(self._chat_buckets),
+        }
+
+    async def _wait_for_turn(self, chat_id: int | str):
+        now = time.monotonic()
+        wait = max(
+            self.global_bucket.reserve(now),
+            self._chat_bucket(chat_id, now).reserve(now),
+        )
+        if wait <= 0:
+            return
+
+        self.delayed_calls += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.queue_depth += 1
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            self.queue_depth -= 1
+
+    def _chat_bucket(self, chat_id: int | str, now: float) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= MAX_IDLE_BUCKETS:
+                self._chat_buckets = {
+                    key: value
+                    for key, value in self._chat_buckets.items()
+                    if not value.idle(now)
+                }
+            # Negative ids (and @channel usernames) are groups and channels.
+            is_group = not isinstance(chat_id, int) or chat_id < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = TokenBucket(rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import os
+from collections.abc import Callable
+
+from config import (
+    USER_REGISTRY_DEBOUNCE,
+    USER_REGISTRY_POLL_INTERVAL,
+    USERS_PLANK_FILE,
+    USERS_YOGA_FILE,
+)
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ("yoga", "plank")
+MIN_OFFSET = -12.0
+MAX_OFFSET = 14.0
+
+
+def parse_users(raw) -> dict[str, float]:
+    """Validate a users file: lowercase usernames mapped to UTC offsets.
+
+    Raises:
+        ValueError: If the structure, a username or an offset is invalid.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("expected a JSON object of username -> UTC offset")
+
+    users = {}
+    for username, offset in raw.items():
+        name = str(username).strip().lstrip("@").lower()
+        if not name:
+            raise ValueError("empty username")
+        if isinstance(offset, bool) or not isinstance(offset, (int, float)):
+            raise ValueError(f"offset of {name!r} is not a number")
+        if not MIN_OFFSET <= offset <= MAX_OFFSET:
+            raise ValueError(f"offset of {name!r} is out of range: {offset}")
+        users[name] = offset
+    return users
+
+
+class UserRegistry:
+    """Guest lists for yoga and plank, reloadable without a restart.
+
+    Keeps one combined set of allowed usernames for the access check and
+    one offset table per feature. A reload only swaps the tables in after
+    both files have been read and validated, so a half-written or broken
+    file never locks anybody out. The first yoga user is the admin.
+    """
+
+    def __init__(
+        self, yoga_path: str = USERS_YOGA_FILE, plank_path: str = USERS_PLANK_FILE
+    ):
+        self.paths = {"yoga": yoga_path, "plank": plank_path}
+        self.yoga: dict[str, float] = {}
+        self.plank: dict[str, float] = {}
+        self.all_users: frozenset[str] = frozenset()
+        self.version = 0
+        self._mtimes: dict[str, int | None] = {}
+        self._listeners: list[Callable[["UserRegistry"], None]] = []
+
+    def is_allowed(self, username: str) -> bool:
+        """Return True if the lowercase username is on any guest list."""
+        return username in self.all_users
+
+    def admin(self) -> str:
+        """Return the admin username (first entry of the yoga list)."""
+        return next(iter(self.yoga), "")
+
+    def on_change(self, callback: Callable[["UserRegistry"], None]):
+        """Call back after every successful (re)load."""
+        self._listeners.append(callback)
+
+    def load(self) -> bool:
+        """Read and validate both files, then swap them in together.
+
+        A missing file counts as an empty list. Returns False (keeping the
+        previous tables) if any file is invalid.
+        """
+        tables = {}
+        mtimes = {}
+        for feature, path in self.paths.items():
+            mtimes[feature] = self._mtime(path)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    tables[feature] = parse_users(json.load(f))
+            except FileNotFoundError:
+                logger.warning("Users file %s not found", path)
+                tables[feature] = {}
+            except (json.JSONDecodeError, ValueError, OSError) as e:
+                logger.error("Keeping previous users, %s is invalid: %s", path, e)
+                return False
+
+        self.yoga = tables["yoga"]
+        self.plank = tables["plank"]
+        self.all_users = frozenset(self.yoga) | frozenset(self.plank)
+        self._mtimes = mtimes
+        self.version += 1
+        logger.info(
+            "Loaded %d yoga and %d plank users", len(self.yoga), len(self.plank)
+        )
+
+        for callback in self._listeners:
+            callback(self)
+        return True
+
+    async def watch(
+        self,
+        interval: float = USER_REGISTRY_POLL_INTERVAL,
+        debounce: float = USER_REGISTRY_DEBOUNCE,
+    ):
+        """Reload whenever a users file changes, once it stops changing."""
+        while True:
+            await asyncio.sleep(interval)
+            if not self._changed():
+                continue
+
+            # Editors often write files in several steps; wait for quiet.
+            snapshot = self._current_mtimes()
+            await asyncio.sleep(debounce)
+            while self._current_mtimes() != snapshot:
+                snapshot = self._current_mtimes()
+                await asyncio.sleep(debounce)
+
+            if not self.load():
+                # Do not retry the same broken content on every poll.
+                self._mtimes = snapshot
+
+    def set_user(self, feature: str, username: str, offset: float):
+        """Add or update a user on a feature list and persist it."""
+        users = dict(self._table(feature))
+        users.update(parse_users({username: offset}))
+        self._write(feature, users)
+
+    def remove_user(self, feature: str, username: str) -> bool:
+        """Remove a user from a feature list and persist it.
+
+        Returns:
+            False if the user was not on the list.
+        """
+        users = dict(self._table(feature))
+        if users.pop(username.lstrip("@").lower(), None) is None:
+            return False
+        self._write(feature, users)
+        return True
+
+    def _table(self, feature: str) -> dict[str, float]:
+        if feature not in FEATURES:
+            raise ValueError(f"unknown feature {feature!r}")
+        return getattr(self, feature)
+
+    def _write(self, feature: str, users: dict[str, float]):
+        path = self.paths[feature]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(users, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.load()
+
+    def _changed(self) -> bool:
+        return self._current_mtimes() != self._mtimes
+
+    def _current_mtimes(self) -> dict[str, int | None]:
+        return {feature: self._mtime(path) for feature, path in self.paths.items()}
+
+    @staticmethod
+    def _mtime(path: str) -> int | None:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+
+user_registry = UserRegistry()
@@ -0,0 +1,169 @@
+"""Webhook transport: an aiohttp app that feeds updates to the dispatcher.
+
+Recorded updates can be replayed against a running server:
+
+Usage:
+    python -m services.webhook updates.json [--url http://localhost:8080/webhook]
+        [--secret TOKEN]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any
+
+import aiohttp
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config import (
+    WEBHOOK_DRAIN_TIMEOUT,
+    WEBHOOK_MAX_CONCURRENCY,
+    WEBHOOK_MAX_PENDING,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Acknowledge updates at once and process them with bounded concurrency.
+
+    Every verified update is answered with 200 before it is handled. At most
+    `max_concurrency` updates run at the same time; the rest wait their
+    turn. Once `max_pending` updates are in flight the server answers 503,
+    and Telegram redelivers the update later instead of it piling up here.
+
+    Background handling is done here through handle() and the dispatcher's
+    public API, with its own task set, rather than by overriding aiogram's
+    private background helpers.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: str | None,
+        max_concurrency: int = WEBHOOK_MAX_CONCURRENCY,
+        max_pending: int = WEBHOOK_MAX_PENDING,
+        drain_timeout: float = WEBHOOK_DRAIN_TIMEOUT,
+        **data: Any,
+    ):
+        super().__init__(
+            dispatcher,
+            bot,
+            handle_in_background=False,
+            secret_token=secret_token,
+            **data,
+        )
+        self.max_pending = max_pending
+        self.drain_timeout = drain_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def in_flight(self) -> int:
+        """Updates accepted and not finished yet (running or waiting)."""
+        return len(self._tasks)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        bot = await self.resolve_bot(request)
+        if not self.verify_secret(request.headers.get(SECRET_HEADER, ""), bot):
+            return web.Response(body="Unauthorized", status=401)
+        if self.in_flight >= self.max_pending:
+            logger.warning(
+                "Webhook backlog full (%d), asking for redelivery", self.in_flight
+            )
+            return web.Response(status=503)
+
+        update = await request.json(loads=bot.session.json_loads)
+        task = asyncio.create_task(self._process(bot, update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    __call__ = handle
+
+    async def _process(self, bot: Bot, update: dict[str, Any]) -> None:
+        async with self._semaphore:
+            try:
+                result = await self.dispatcher.feed_raw_update(
+                    bot=bot, update=update, **self.data
+                )
+                if isinstance(result, TelegramMethod):
+                    await self.dispatcher.silent_call_request(bot=bot, result=result)
+            except Exception:
+                logger.exception("Failed to process update %s", update.get("update_id"))
+
+    async def close(self) -> None:
+        tasks = set(self._tasks)
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.drain_timeout)
+            if pending:
+                logger.warning(
+                    "Dropping %d unfinished updates on shutdown", len(pending)
+                )
+                for task in pending:
+                    task.cancel()
+        await super().close()
+
+
+def build_webhook_app(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    secret_token: str | None,
+    path: str = WEBHOOK_PATH,
+    **handler_kwargs: Any,
+) -> web.Application:
+    """Create the aiohttp application serving the webhook route."""
+    app = web.Application()
+    handler = BoundedRequestHandler(dispatcher, bot, secret_token, **handler_kwargs)
+    handler.register(app, path=path)
+    setup_application(app, dispatcher, bot=bot)
+    return app
+
+
+def load_updates(path: str) -> list[dict]:
+    """Read recorded updates: a JSON list, a single update or JSON lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in raw.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+
+async def post_updates(url: str, updates: list[dict], secret: str | None) -> list[int]:
+    """POST updates to a webhook one by one and return the status codes."""
+    headers = {SECRET_HEADER: secret} if secret else {}
+    statuses = []
+    async with aiohttp.ClientSession() as session:
+        for update in updates:
+            async with session.post(url, json=update, headers=headers) as response:
+                statuses.append(response.status)
+    return statuses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("updates", help="JSON file with recorded updates")
+    parser.add_argument(
+        "--url", default=f"http://localhost:{WEBHOOK_PORT}{WEBHOOK_PATH}"
+    )
+    parser.add_argument("--secret", default=None)
+    args = parser.parse_args()
+
+    statuses = asyncio.run(
+        post_updates(args.url, load_updates(args.updates), args.secret)
+    )
+    for status in sorted(set(statuses)):
+        print(f"{status}: {statuses.count(status)}")
+    if any(status != 200 for status in statuses):
+        raise SystemExit(1)
@@ -26,12 +26,19 @@ async def initialize_test_db_schema(test_db_path):
 @pytest.fixture(autouse=True)
 async def isolated_db_session(monkeypatch, test_db_path):
     monkeypatch.setattr(db, "DB_NAME", str(test_db_path))
+    db.stats_cache.clear()
+    db.leaderboard.reset()
 
     yield
 
     async with aiosqlite.connect(str(test_db_path)) as conn:
         try:
             await conn.execute("DELETE FROM plank_history")
+            await conn.execute("DELETE FROM plank_daily_stats")
+            await conn.execute("DELETE FROM plank_usernames")
+            await conn.execute("DELETE FROM graph_file_cache")
+            await conn.execute("DELETE FROM yoga_sessions")
+            await conn.execute("DELETE FROM fsm_states")
 
             await conn.execute("DELETE FROM sqlite_sequence WHERE name='plank_history'")
 
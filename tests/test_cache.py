@@ -0,0 +1,87 @@
+from datetime import date
+
+import pytest
+
+from db import database as db
+from db.cache import StatsCache
+
+TEST_USER_ID = 777
+
+
+def test_lru_eviction_by_entry_count():
+    cache = StatsCache(max_entries=2, max_bytes=1_000_000)
+    cache.put(1, ("stats",), "a", cache.generation(1))
+    cache.put(2, ("stats",), "b", cache.generation(2))
+    assert cache.get(1, ("stats",)) == "a"
+
+    cache.put(3, ("stats",), "c", cache.generation(3))
+
+    assert cache.get(2, ("stats",)) is None
+    assert cache.get(1, ("stats",)) == "a"
+    assert cache.get(3, ("stats",)) == "c"
+
+
+def test_memory_cap_evicts_entries():
+    cache = StatsCache(max_entries=100, max_bytes=2_000)
+    for user_id in range(10):
+        cache.put(user_id, ("details",), [("2025-01-01", 60)] * 5, 0)
+
+    assert cache.snapshot()["bytes"] <= 2_000
+    assert cache.snapshot()["entries"] < 10
+
+
+def test_invalidation_is_per_user_and_blocks_racing_put():
+    cache = StatsCache(max_entries=10, max_bytes=1_000_000)
+    cache.put(1, ("stats",), "one", 0)
+    cache.put(2, ("stats",), "two", 0)
+
+    generation = cache.generation(1)
+    cache.invalidate_user(1)
+    cache.put(1, ("stats",), "stale", generation)
+
+    assert cache.get(1, ("stats",)) is None
+    assert cache.get(2, ("stats",)) == "two"
+
+
+def test_day_rollover_clears_entries():
+    cache = StatsCache(max_entries=10, max_bytes=1_000_000)
+    cache.put(1, ("stats",), "yesterday", 0)
+    cache._day = date(2000, 1, 1)
+
+    assert cache.get(1, ("stats",)) is None
+
+
+@pytest.mark.asyncio
+async def test_stats_served_from_cache_until_save():
+    await db.save_plank_result(TEST_USER_ID, "cached", 60)
+    await db.get_user_stats(TEST_USER_ID)
+    hits = db.stats_cache.hits
+
+    stats = await db.get_user_stats(TEST_USER_ID)
+    assert db.stats_cache.hits == hits + 1
+    assert stats[7]["total"] == 60
+
+    record_id = await db.save_plank_result(TEST_USER_ID, "cached", 40)
+    assert (await db.get_user_stats(TEST_USER_ID))[7]["total"] == 100
+
+    await db.delete_plank_result(record_id)
+    assert (await db.get_user_stats(TEST_USER_ID))[7]["total"] == 60
+
+
+@pytest.mark.asyncio
+async def test_details_pages_served_from_cache_until_save():
+    first_id = await db.save_plank_result(TEST_USER_ID, "cached", 60)
+    await db.get_plank_page(TEST_USER_ID)
+    hits = db.stats_cache.hits
+
+    rows, _ = await db.get_plank_page(TEST_USER_ID)
+    assert db.stats_cache.hits == hits + 1
+    assert [row[1:] for row in rows] == [(first_id, 60)]
+
+    record_id = await db.save_plank_result(TEST_USER_ID, "cached", 40)
+    rows, _ = await db.get_plank_page(TEST_USER_ID)
+    assert [row[1:] for row in rows] == [(record_id, 40), (first_id, 60)]
+
+    await db.delete_plank_result(record_id)
+    rows, _ = await db.get_plank_page(TEST_USER_ID)
+    assert [row[1:] for row in rows] == [(first_id, 60)]
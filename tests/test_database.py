@@ -1,21 +1,30 @@
+import asyncio
+import aiosqlite
 import pytest
+from datetime import datetime, timezone
 from db import database as db
+from db import writer as writer_module
+from db.rollup import backfill_rollup, check_rollup
+from utils import local_epoch_day
 
 TEST_USER_ID = 666
 
 
+async def _durations(user_id):
+    """Return all of the user's saved durations, oldest first."""
+    rows, _ = await db.get_plank_page(user_id, limit=1000)
+    return [duration for _, _, duration in reversed(rows)]
+
+
 @pytest.mark.asyncio
 async def test_plank_lifecycle():
     record_id = await db.save_plank_result(TEST_USER_ID, "tester", 60)
     assert record_id is not None
 
-    history = await db.get_plank_history(TEST_USER_ID)
-    assert len(history) == 1
-    assert history[0][1] == 60
+    assert await _durations(TEST_USER_ID) == [60]
 
     await db.delete_plank_result(record_id)
-    history_after = await db.get_plank_history(TEST_USER_ID)
-    assert len(history_after) == 0
+    assert await _durations(TEST_USER_ID) == []
 
 
 @pytest.mark.asyncio
@@ -32,3 +41,198 @@ async def test_user_stats_calculation():
     assert stat_7["count"] == 2
     assert stat_7["max"] == 60
     assert stat_7["avg"] == 45.0
+
+
+@pytest.mark.asyncio
+async def test_pooled_connections_reused():
+    await db.open_pool(size=2)
+    try:
+        record_id = await db.save_plank_result(TEST_USER_ID, "pooled", 45)
+        results = await asyncio.gather(
+            *(db.get_user_stats(TEST_USER_ID) for _ in range(10))
+        )
+        assert all(stats[7]["total"] == 45 for stats in results)
+
+        await db.delete_plank_result(record_id)
+        assert await _durations(TEST_USER_ID) == []
+    finally:
+        await db.close_pool()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_assigns_ids_and_flushes():
+    await db.start_writer(batch_size=10, max_delay=0.01)
+    try:
+        ids = [
+            await db.save_plank_result(TEST_USER_ID, "batched", 30 + i)
+            for i in range(25)
+        ]
+        assert ids == sorted(set(ids))
+
+        assert len(await _durations(TEST_USER_ID)) == 25
+    finally:
+        await db.stop_writer()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_delete_of_queued_row():
+    await db.start_writer(batch_size=10, max_delay=0.05)
+    try:
+        kept_id = await db.save_plank_result(TEST_USER_ID, "queued", 40)
+        save = asyncio.create_task(db.save_plank_result(TEST_USER_ID, "queued", 50))
+        await asyncio.sleep(0)
+        dropped_id = db._writer._next_id
+        await db.delete_plank_result(dropped_id)
+        assert await save == dropped_id
+
+        assert await _durations(TEST_USER_ID) == [40]
+
+        await db.delete_plank_result(kept_id)
+        assert await _durations(TEST_USER_ID) == []
+    finally:
+        await db.stop_writer()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_retries_failed_batches(monkeypatch):
+    failures = {"left": 2}
+    real_add_to_rollup = writer_module.add_to_rollup
+
+    async def flaky_add_to_rollup(conn, user_id, day, duration):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise aiosqlite.OperationalError("database is locked")
+        await real_add_to_rollup(conn, user_id, day, duration)
+
+    monkeypatch.setattr(writer_module, "add_to_rollup", flaky_add_to_rollup)
+    await db.start_writer(batch_size=10, max_delay=0.01)
+    db._writer.retry_delay = 0.01
+    try:
+        await db.get_leaderboard("week", {"flaky": 0})
+        await db.save_plank_result(TEST_USER_ID, "flaky", 60)
+        assert (await db.get_leaderboard("week", {"flaky": 0}))["best"] == [
+            ("flaky", 60)
+        ]
+        assert await _durations(TEST_USER_ID) == [60]
+    finally:
+        await db.stop_writer()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_fails_only_the_failing_insert(monkeypatch):
+    real_add_to_rollup = writer_module.add_to_rollup
+
+    async def poisoned_add_to_rollup(conn, user_id, day, duration):
+        if duration == 13:
+            raise ValueError("bad row")
+        await real_add_to_rollup(conn, user_id, day, duration)
+
+    monkeypatch.setattr(writer_module, "add_to_rollup", poisoned_add_to_rollup)
+    await db.start_writer(batch_size=10, max_delay=0.05)
+    db._writer.retries = 1
+    db._writer.retry_delay = 0.01
+    try:
+        results = await asyncio.gather(
+            *(
+                db.save_plank_result(TEST_USER_ID, "poisoned", duration)
+                for duration in (40, 13, 50)
+            ),
+            return_exceptions=True,
+        )
+        assert isinstance(results[1], ValueError)
+        assert all(isinstance(result, int) for result in results[::2])
+        assert sorted(await _durations(TEST_USER_ID)) == [40, 50]
+    finally:
+        await db.stop_writer()
+
+
+@pytest.mark.asyncio
+async def test_daily_rollup_tracks_saves_and_deletes():
+    best_id = await db.save_plank_result(TEST_USER_ID, "rollup", 90)
+    await db.save_plank_result(TEST_USER_ID, "rollup", 30)
+
+    stats = await db.get_user_stats(TEST_USER_ID, windows=(7, 365))
+    assert stats[365] == {"total": 120, "count": 2, "max": 90, "avg": 60}
+
+    await db.delete_plank_result(best_id)
+    stats = await db.get_user_stats(TEST_USER_ID)
+    assert stats[7] == {"total": 30, "count": 1, "max": 30, "avg": 30}
+
+    async with aiosqlite.connect(db.DB_NAME) as conn:
+        assert await check_rollup(conn) == []
+        await conn.execute("DELETE FROM plank_daily_stats")
+        assert len(await check_rollup(conn)) == 1
+        await backfill_rollup(conn)
+        assert await check_rollup(conn) == []
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_walk_the_history_both_ways():
+    async with aiosqlite.connect(db.DB_NAME) as conn:
+        await conn.executemany(
+            "INSERT INTO plank_history (user_id, username, duration, day, created_at) "
+            "VALUES (?, 'pager', ?, ?, 0)",
+            [(TEST_USER_ID, 30 + i, 20000 + i // 2) for i in range(7)],
+        )
+        await conn.commit()
+
+    first, has_more = await db.get_plank_page(TEST_USER_ID, limit=3)
+    assert [duration for _, _, duration in first] == [36, 35, 34]
+    assert has_more
+
+    second, has_more = await db.get_plank_page(
+        TEST_USER_ID, limit=3, cursor=first[-1][:2]
+    )
+    assert [duration for _, _, duration in second] == [33, 32, 31]
+    assert has_more
+
+    last, has_more = await db.get_plank_page(
+        TEST_USER_ID, limit=3, cursor=second[-1][:2]
+    )
+    assert [duration for _, _, duration in last] == [30]
+    assert not has_more
+
+    back, has_more = await db.get_plank_page(
+        TEST_USER_ID, limit=3, cursor=second[0][:2], newer=True
+    )
+    assert back == first
+    assert not has_more
+
+    assert await _durations(TEST_USER_ID) == [30, 31, 32, 33, 34, 35, 36]
+
+
+@pytest.mark.asyncio
+async def test_plank_series_aggregates_days_and_weeks():
+    today = local_epoch_day(datetime.now(timezone.utc), 0)
+    monday = today - (today + 3) % 7
+    async with aiosqlite.connect(db.DB_NAME) as conn:
+        await conn.executemany(
+            "INSERT INTO plank_daily_stats (user_id, day, total, count, max) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (TEST_USER_ID, monday - 7, 100, 2, 60),
+                (TEST_USER_ID, monday, 90, 2, 50),
+                (TEST_USER_ID, monday + 1, 30, 1, 30),
+            ],
+        )
+        await conn.commit()
+
+    daily = await db.get_plank_series(TEST_USER_ID)
+    assert daily == [(monday - 7, 60, 50.0), (monday, 50, 45.0), (monday + 1, 30, 30.0)]
+
+    weekly = await db.get_plank_series(TEST_USER_ID, weekly=True)
+    assert weekly == [(monday - 7, 60, 50.0), (monday, 50, 40.0)]
+
+    assert await db.get_plank_series(TEST_USER_ID, days=1) in ([], [daily[-1]])
+
+
+@pytest.mark.asyncio
+async def test_graph_file_id_cache():
+    assert await db.get_graph_file_id(TEST_USER_ID, "abc") is None
+
+    await db.save_graph_file_id(TEST_USER_ID, "abc", "file-1")
+    assert await db.get_graph_file_id(TEST_USER_ID, "abc") == "file-1"
+
+    await db.save_graph_file_id(TEST_USER_ID, "def", "file-2")
+    assert await db.get_graph_file_id(TEST_USER_ID, "abc") is None
+    assert await db.get_graph_file_id(TEST_USER_ID, "def") == "file-2"
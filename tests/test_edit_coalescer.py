@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from services.edit_coalescer import EditCoalescer
+
+
+@pytest.mark.asyncio
+async def test_burst_collapses_to_leading_and_trailing_edit():
+    coalescer = EditCoalescer(interval=0.05)
+    sent = []
+    state = {"votes": 0}
+
+    async def edit():
+        sent.append(state["votes"])
+
+    for _ in range(10):
+        state["votes"] += 1
+        coalescer.schedule("msg", edit)
+        await asyncio.sleep(0)
+
+    while coalescer.pending("msg"):
+        await asyncio.sleep(0.01)
+
+    assert sent == [1, 10]
+
+
+@pytest.mark.asyncio
+async def test_keys_are_independent():
+    coalescer = EditCoalescer(interval=0.05)
+    sent = []
+
+    for key in ("a", "b"):
+        coalescer.schedule(key, lambda key=key: asyncio.sleep(0, sent.append(key)))
+    await asyncio.sleep(0.01)
+
+    assert sorted(sent) == ["a", "b"]
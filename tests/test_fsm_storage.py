@@ -0,0 +1,133 @@
+import asyncio
+import time
+from datetime import datetime
+
+import aiosqlite
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+from db import database as db
+from db.fsm_storage import SQLiteStorage, dumps_data, loads_data
+from handlers.plank import PlankState
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+OTHER_KEY = StorageKey(bot_id=1, chat_id=20, user_id=20)
+
+
+@pytest.fixture
+async def storage():
+    storage = SQLiteStorage(db.DB_NAME, flush_interval=3600)
+    yield storage
+    await storage.close()
+    async with aiosqlite.connect(db.DB_NAME) as conn:
+        await conn.execute("DELETE FROM fsm_states")
+        await conn.commit()
+
+
+async def _row_count() -> int:
+    async with aiosqlite.connect(db.DB_NAME) as conn:
+        async with conn.execute("SELECT COUNT(*) FROM fsm_states") as cursor:
+            return (await cursor.fetchone())[0]
+
+
+def test_serialization_is_compact_and_round_trips():
+    data = {"current_seconds": 75, "when": datetime(2025, 1, 2, 19, 30)}
+
+    raw = dumps_data(data)
+
+    assert " " not in raw
+    assert loads_data(raw) == data
+
+
+@pytest.mark.asyncio
+async def test_state_survives_restart(storage):
+    await storage.set_state(KEY, PlankState.adjusting)
+    await storage.update_data(KEY, {"current_seconds": 75})
+    assert await _row_count() == 0
+
+    await storage.close()
+
+    restarted = SQLiteStorage(db.DB_NAME, flush_interval=3600)
+    try:
+        assert await restarted.get_state(KEY) == PlankState.adjusting.state
+        assert await restarted.get_data(KEY) == {"current_seconds": 75}
+        assert await restarted.get_state(OTHER_KEY) is None
+    finally:
+        await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_batches_and_clear_deletes_row(storage):
+    for seconds in range(10):
+        await storage.update_data(KEY, {"current_seconds": seconds})
+    await storage.set_state(OTHER_KEY, PlankState.adjusting)
+    await storage.flush()
+    assert await _row_count() == 2
+
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+    await storage.flush()
+    assert await _row_count() == 1
+
+
+@pytest.mark.asyncio
+async def test_returned_data_is_a_copy(storage):
+    await storage.set_data(KEY, {"current_seconds": 60})
+
+    data = await storage.get_data(KEY)
+    data["current_seconds"] = 0
+
+    assert await storage.get_data(KEY) == {"current_seconds": 60}
+
+
+@pytest.mark.asyncio
+async def test_idle_states_expire(storage):
+    await storage.set_state(KEY, PlankState.adjusting)
+    await storage.set_state(OTHER_KEY, PlankState.adjusting)
+    await storage.flush()
+
+    storage.ttl = 60
+    storage._records[storage.key_builder.build(KEY)].touched = time.time() - 120
+    async with aiosqlite.connect(db.DB_NAME) as conn:
+        await conn.execute(
+            "UPDATE fsm_states SET updated_at = ? WHERE key = ?",
+            (time.time() - 120, storage.key_builder.build(KEY)),
+        )
+        await conn.commit()
+
+    assert await storage.expire() == 1
+    assert await _row_count() == 1
+    assert await storage.get_state(KEY) is None
+    assert await storage.get_state(OTHER_KEY) == PlankState.adjusting.state
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_access_loads_once(storage):
+    await storage.set_data(KEY, {"current_seconds": 60})
+    await storage.close()
+
+    restarted = SQLiteStorage(db.DB_NAME, flush_interval=3600)
+    try:
+
+        async def tap():
+            data = await restarted.get_data(KEY)
+            await restarted.set_data(KEY, {**data, "taps": data.get("taps", 0) + 1})
+
+        await asyncio.gather(tap(), tap())
+        assert (await restarted.get_data(KEY))["current_seconds"] == 60
+        assert len(restarted._records) == 1
+    finally:
+        await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_unserializable_data_fails_in_set_data_not_flush(storage):
+    await storage.set_data(KEY, {"current_seconds": 60})
+
+    with pytest.raises(TypeError):
+        await storage.set_data(KEY, {"voters": {"mark"}})
+    await storage.set_data(OTHER_KEY, {"current_seconds": 90})
+    await storage.flush()
+
+    assert await storage.get_data(KEY) == {"current_seconds": 60}
+    assert await _row_count() == 2
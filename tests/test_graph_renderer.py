@@ -0,0 +1,58 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from services.graph_renderer import GraphRenderer, points_fingerprint
+
+POINTS = [(datetime(2025, 10, day), 60 + day) for day in range(1, 6)]
+
+render_calls = []
+
+
+def _counting_render(points):
+    render_calls.append(points)
+    time.sleep(0.05)
+    return b"png"
+
+
+def _slow_render(points):
+    time.sleep(0.5)
+    return b"png"
+
+
+def test_fingerprint_depends_on_points():
+    assert points_fingerprint(POINTS) == points_fingerprint(list(POINTS))
+    assert points_fingerprint(POINTS) != points_fingerprint(POINTS[:-1])
+    assert points_fingerprint(POINTS, "90") != points_fingerprint(POINTS, "365")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_render():
+    render_calls.clear()
+    renderer = GraphRenderer(workers=2, timeout=5, render_func=_counting_render)
+
+    results = await asyncio.gather(*(renderer.render(1, POINTS) for _ in range(5)))
+
+    assert results == [b"png"] * 5
+    assert len(render_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_timeout_returns_none():
+    renderer = GraphRenderer(workers=1, timeout=0.05, render_func=_slow_render)
+
+    assert await renderer.render(1, POINTS) is None
+
+
+@pytest.mark.asyncio
+async def test_process_pool_renders_png():
+    renderer = GraphRenderer(workers=1, timeout=60)
+    renderer.start()
+    try:
+        png = await renderer.render(1, POINTS)
+    finally:
+        renderer.stop()
+
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
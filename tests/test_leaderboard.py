@@ -0,0 +1,105 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import aiosqlite
+import pytest
+
+from db import database as db
+from db.profiler import query_profiler
+from handlers import plank
+
+ALLOWED = {"mark": 3, "olga": 0}
+
+
+@asynccontextmanager
+async def _no_queries():
+    raise AssertionError("leaderboard read hit the database")
+    yield
+
+
+@pytest.mark.asyncio
+async def test_ranks_allowed_users_and_updates_without_queries(monkeypatch):
+    await db.save_plank_result(1, "mark", 90)
+    await db.save_plank_result(2, "olga", 60)
+    await db.save_plank_result(2, "olga", 70)
+    await db.save_plank_result(3, "stranger", 300)
+
+    standings = await db.get_leaderboard("week", ALLOWED)
+    assert standings == {
+        "best": [("mark", 90), ("olga", 70)],
+        "total": [("olga", 130), ("mark", 90)],
+    }
+
+    await db.save_plank_result(1, "mark", 60)
+    monkeypatch.setattr(db, "_connect", _no_queries)
+
+    standings = await db.get_leaderboard("all", ALLOWED)
+    assert standings["total"] == [("mark", 150), ("olga", 130)]
+
+
+@pytest.mark.asyncio
+async def test_delete_reloads_only_that_user():
+    best_id = await db.save_plank_result(1, "mark", 90)
+    await db.save_plank_result(1, "mark", 40)
+    await db.save_plank_result(2, "olga", 60)
+    await db.get_leaderboard("month", ALLOWED)
+
+    await db.delete_plank_result(best_id)
+
+    standings = await db.get_leaderboard("month", ALLOWED)
+    assert standings["best"] == [("olga", 60), ("mark", 40)]
+    assert standings["total"] == [("olga", 60), ("mark", 40)]
+
+
+@pytest.mark.asyncio
+async def test_stale_reload_searches_only_that_user(monkeypatch):
+    record_id = await db.save_plank_result(1, "mark", 90)
+    await db.save_plank_result(2, "olga", 60)
+    await db.get_leaderboard("week", ALLOWED)
+    await db.delete_plank_result(record_id)
+
+    monkeypatch.setattr(query_profiler, "enabled", True)
+    query_profiler.reset()
+    await db.get_leaderboard("week", ALLOWED)
+
+    reload_queries = query_profiler.top()
+    query_profiler.reset()
+    assert len(reload_queries) == 3
+    for entry in reload_queries:
+        assert "user_id IN (?)" in entry["sql"]
+        assert "plank_history" not in entry["sql"]
+        assert entry["plan"].startswith("SEARCH")
+
+
+@pytest.mark.asyncio
+async def test_rebuild_from_rollup_matches_incremental_updates():
+    await db.get_leaderboard("all", ALLOWED)
+    for user_id, username, duration in [(1, "mark", 50), (2, "olga", 80)]:
+        await db.save_plank_result(user_id, username, duration)
+    incremental = await db.get_leaderboard("all", ALLOWED)
+
+    db.leaderboard.reset()
+
+    assert await db.get_leaderboard("all", ALLOWED) == incremental
+    async with aiosqlite.connect(db.DB_NAME) as conn:
+        async with conn.execute("SELECT COUNT(*) FROM plank_daily_stats") as cursor:
+            assert (await cursor.fetchone())[0] == 2
+
+
+@pytest.mark.asyncio
+async def test_command_reuses_rendered_text(monkeypatch):
+    await db.save_plank_result(1, "mark", 90)
+    get_leaderboard = AsyncMock(wraps=db.get_leaderboard)
+    monkeypatch.setattr(plank, "get_leaderboard", get_leaderboard)
+
+    messages = []
+    for _ in range(3):
+        message = MagicMock()
+        message.answer = AsyncMock()
+        command = MagicMock(args=None)
+        await plank.show_leaderboard(message, command, plank_users_map=ALLOWED)
+        messages.append(message.answer.await_args.args[0])
+
+    assert get_leaderboard.await_count == 1
+    assert messages[0] == messages[2]
+    assert "@mark: <code>1:30 min</code>" in messages[0]
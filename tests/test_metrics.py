@@ -0,0 +1,145 @@
+import pytest
+import pytest_asyncio
+from aiogram import Bot, Dispatcher, F
+from aiogram.types import CallbackQuery, Message, Update
+from aiohttp.test_utils import TestClient, TestServer
+
+from benchmarks.fake_session import FAKE_TOKEN, RecordingSession
+from db import database as db
+from middlewares import AccessMiddleware, MetricsMiddleware
+from services.metrics import (
+    DB_QUERY_SECONDS,
+    HANDLER_ERRORS,
+    HANDLER_SECONDS,
+    REJECTED_UPDATES,
+    MetricsRegistry,
+    build_metrics_app,
+)
+
+
+class _Registry:
+    yoga = {"mark": 3}
+    plank = {"mark": 3}
+
+    @staticmethod
+    def is_allowed(username):
+        return username == "mark"
+
+
+def _message(username: str, text: str) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 1735732800,
+                "chat": {"id": 1, "type": "private"},
+                "from": {
+                    "id": 1,
+                    "is_bot": False,
+                    "first_name": "M",
+                    "username": username,
+                },
+                "text": text,
+            },
+        }
+    )
+
+
+def _callback(data: str) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 2,
+            "callback_query": {
+                "id": "2",
+                "from": {
+                    "id": 1,
+                    "is_bot": False,
+                    "first_name": "M",
+                    "username": "mark",
+                },
+                "chat_instance": "1",
+                "data": data,
+            },
+        }
+    )
+
+
+@pytest.fixture
+def dispatcher():
+    dp = Dispatcher()
+    metrics = MetricsMiddleware()
+    dp.update.outer_middleware(metrics)
+    dp.update.outer_middleware(AccessMiddleware(_Registry()))
+    dp.message.middleware(metrics.label_handler)
+    dp.callback_query.middleware(metrics.label_handler)
+
+    @dp.message()
+    async def echo_handler(message: Message):
+        pass
+
+    @dp.callback_query(F.data == "boom")
+    async def failing_handler(callback: CallbackQuery):
+        raise RuntimeError("boom")
+
+    return dp
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency", "Latency.", ["op"], buckets=(0.1, 1))
+    histogram.observe(0.05, op="a")
+    histogram.observe(0.5, op="a")
+    histogram.observe(5, op="a")
+
+    text = registry.render()
+
+    assert "# TYPE latency histogram" in text
+    assert 'latency_bucket{op="a",le="0.1"} 1' in text
+    assert 'latency_bucket{op="a",le="1"} 2' in text
+    assert 'latency_bucket{op="a",le="+Inf"} 3' in text
+    assert 'latency_count{op="a"} 3' in text
+
+
+@pytest.mark.asyncio
+async def test_middleware_records_handlers_errors_and_rejections(dispatcher):
+    bot = Bot(token=FAKE_TOKEN, session=RecordingSession())
+    handled = HANDLER_SECONDS.count(handler="echo_handler")
+    errors = HANDLER_ERRORS.value(handler="failing_handler")
+    rejected = REJECTED_UPDATES.value()
+
+    await dispatcher.feed_update(bot, _message("mark", "hi"))
+    await dispatcher.feed_update(bot, _message("stranger", "hi"))
+    with pytest.raises(RuntimeError):
+        await dispatcher.feed_update(bot, _callback("boom"))
+    await dispatcher.feed_update(bot, _callback("unknown"))
+
+    assert HANDLER_SECONDS.count(handler="echo_handler") == handled + 1
+    assert HANDLER_ERRORS.value(handler="failing_handler") == errors + 1
+    assert REJECTED_UPDATES.value() == rejected + 1
+
+
+@pytest.mark.asyncio
+async def test_database_calls_are_timed():
+    calls = DB_QUERY_SECONDS.count(query="get_user_stats")
+
+    await db.get_user_stats(1)
+
+    assert DB_QUERY_SECONDS.count(query="get_user_stats") == calls + 1
+
+
+@pytest_asyncio.fixture(loop_scope="function")
+async def metrics_client():
+    client = TestClient(TestServer(build_metrics_app()))
+    await client.start_server()
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_prometheus_text(metrics_client):
+    response = await metrics_client.get("/metrics")
+
+    assert response.status == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE bot_handler_seconds histogram" in await response.text()
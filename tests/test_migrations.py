@@ -0,0 +1,125 @@
+import aiosqlite
+import pytest
+
+from db import database as db
+from db.migrations import MIGRATIONS
+
+
+@pytest.fixture
+def legacy_db_path(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    monkeypatch.setattr(db, "DB_NAME", str(path))
+    return path
+
+
+@pytest.mark.asyncio
+async def test_upgrades_legacy_database_in_place(legacy_db_path):
+    async with aiosqlite.connect(legacy_db_path) as conn:
+        await conn.execute(
+            """
+            CREATE TABLE plank_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                username TEXT,
+                duration INTEGER,
+                date TEXT
+            )
+        """
+        )
+        await conn.execute(
+            "INSERT INTO plank_history (user_id, username, duration, date) "
+            "VALUES (1, 'old', 90, '2025-01-01')"
+        )
+        await conn.commit()
+
+    await db.init_db()
+
+    async with aiosqlite.connect(legacy_db_path) as conn:
+        async with conn.execute("PRAGMA journal_mode") as cursor:
+            assert (await cursor.fetchone())[0] == "wal"
+        async with conn.execute("SELECT MAX(version) FROM schema_version") as cursor:
+            assert (await cursor.fetchone())[0] == MIGRATIONS[-1][0]
+        async with conn.execute(
+            "SELECT user_id, duration, day, created_at FROM plank_history"
+        ) as cursor:
+            # 2025-01-01 is epoch day 20089; the timestamp is set to its midday UTC.
+            assert await cursor.fetchall() == [(1, 90, 20089, 1735732800)]
+        async with conn.execute("SELECT * FROM plank_daily_stats") as cursor:
+            assert await cursor.fetchall() == [(1, 20089, 90, 1, 90)]
+        async with conn.execute("SELECT * FROM plank_usernames") as cursor:
+            assert await cursor.fetchall() == [(1, "old")]
+
+
+@pytest.mark.asyncio
+async def test_upgrade_skips_legacy_rows_with_nulls(legacy_db_path):
+    async with aiosqlite.connect(legacy_db_path) as conn:
+        await conn.execute(
+            """
+            CREATE TABLE plank_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                username TEXT,
+                duration INTEGER,
+                date TEXT
+            )
+        """
+        )
+        await conn.executemany(
+            "INSERT INTO plank_history (user_id, username, duration, date) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (1, "old", 90, "2025-01-01"),
+                (None, "ghost", 60, "2025-01-01"),
+                (1, "old", None, "2025-01-01"),
+                (1, "old", 30, None),
+            ],
+        )
+        await conn.commit()
+
+    await db.init_db()
+
+    async with aiosqlite.connect(legacy_db_path) as conn:
+        async with conn.execute(
+            "SELECT user_id, duration FROM plank_history"
+        ) as cursor:
+            assert await cursor.fetchall() == [(1, 90)]
+        async with conn.execute("SELECT * FROM plank_daily_stats") as cursor:
+            assert await cursor.fetchall() == [(1, 20089, 90, 1, 90)]
+
+
+@pytest.mark.asyncio
+async def test_stats_queries_use_index(legacy_db_path):
+    await db.init_db()
+
+    async with aiosqlite.connect(legacy_db_path) as conn:
+        async with conn.execute(
+            "EXPLAIN QUERY PLAN SELECT duration FROM plank_history "
+            "WHERE user_id = ? AND day >= ? ORDER BY day DESC, id DESC",
+            (1, 20000),
+        ) as cursor:
+            plan = " ".join(row[-1] for row in await cursor.fetchall())
+
+    assert "idx_plank_history_user_day" in plan
+    assert "TEMP B-TREE" not in plan
+
+    async with aiosqlite.connect(legacy_db_path) as conn:
+        async with conn.execute(
+            "EXPLAIN QUERY PLAN SELECT day, id, duration FROM plank_history "
+            "WHERE user_id = ? AND (day, id) < (?, ?) "
+            "ORDER BY day DESC, id DESC LIMIT 21",
+            (1, 20000, 5),
+        ) as cursor:
+            plan = " ".join(row[-1] for row in await cursor.fetchall())
+
+    assert "idx_plank_history_user_day" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_migrations_are_idempotent(legacy_db_path):
+    await db.init_db()
+    await db.init_db()
+
+    async with aiosqlite.connect(legacy_db_path) as conn:
+        async with conn.execute("SELECT COUNT(*) FROM schema_version") as cursor:
+            assert (await cursor.fetchone())[0] == len(MIGRATIONS)
@@ -0,0 +1,121 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from db import database as db
+from handlers import plank
+from states import PlankState
+
+TEST_USER_ID = 888
+
+
+def _callback(data: str) -> MagicMock:
+    callback = MagicMock()
+    callback.data = data
+    callback.answer = AsyncMock()
+    callback.message.chat.id = TEST_USER_ID
+    callback.message.message_id = 1
+    callback.message.edit_reply_markup = AsyncMock()
+    callback.message.edit_text = AsyncMock()
+    callback.from_user.id = TEST_USER_ID
+    callback.from_user.username = "slider"
+    callback.from_user.first_name = "Slider"
+    return callback
+
+
+@pytest.fixture
+async def slider_state():
+    key = StorageKey(bot_id=1, chat_id=TEST_USER_ID, user_id=TEST_USER_ID)
+    state = FSMContext(storage=MemoryStorage(), key=key)
+    await state.set_state(PlankState.adjusting)
+    await state.update_data(current_seconds=60)
+    return state
+
+
+async def _wait_for_edits():
+    while plank.slider_edits.pending((TEST_USER_ID, 1)):
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_fast_taps_are_all_counted_but_edits_are_bounded(slider_state):
+    taps = [_callback("plank_adj_5") for _ in range(10)]
+
+    await asyncio.gather(
+        *(plank.process_plank_adjustment(tap, slider_state) for tap in taps)
+    )
+    await _wait_for_edits()
+
+    data = await slider_state.get_data()
+    assert data["current_seconds"] == 110
+    assert data["slider_shown_version"] == data["slider_version"] == 10
+
+    edits = [
+        call for tap in taps for call in tap.message.edit_reply_markup.await_args_list
+    ]
+    assert 1 <= len(edits) <= 2
+    last_markup = edits[-1].kwargs["reply_markup"]
+    assert last_markup.inline_keyboard[0][1].text == "⏱ 1:50 min"
+
+
+@pytest.mark.asyncio
+async def test_final_uses_latest_value_not_stale_button(slider_state):
+    for _ in range(3):
+        await plank.process_plank_adjustment(_callback("plank_adj_10"), slider_state)
+
+    final = _callback("plank_final_1:00 min")
+    await plank.process_plank_final(final, slider_state, plank_users_map={})
+    await _wait_for_edits()
+
+    rows, _ = await db.get_plank_page(TEST_USER_ID)
+    assert [duration for _, _, duration in rows] == [90]
+    assert "1:30 min" in final.message.edit_text.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_final_during_slow_edit_does_not_freeze_next_slider(slider_state):
+    release = asyncio.Event()
+
+    async def slow_edit(**kwargs):
+        await release.wait()
+
+    tap = _callback("plank_adj_5")
+    tap.message.edit_reply_markup = AsyncMock(side_effect=slow_edit)
+
+    await plank.process_plank_adjustment(tap, slider_state)
+    while not tap.message.edit_reply_markup.await_count:
+        await asyncio.sleep(0.01)
+    await plank.process_plank_final(
+        _callback("plank_final_1:00 min"), slider_state, plank_users_map={}
+    )
+    release.set()
+    await _wait_for_edits()
+    assert await slider_state.get_data() == {}
+
+    message = MagicMock()
+    message.answer = AsyncMock()
+    message.from_user.username = "slider"
+    await plank.cmd_plank(message, slider_state)
+    next_tap = _callback("plank_adj_5")
+    await plank.process_plank_adjustment(next_tap, slider_state)
+    await _wait_for_edits()
+
+    assert next_tap.message.edit_reply_markup.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_save_is_reported_and_keeps_the_slider(slider_state, monkeypatch):
+    monkeypatch.setattr(
+        plank, "save_plank_result", AsyncMock(side_effect=ValueError("disk full"))
+    )
+    final = _callback("plank_final_1:00")
+
+    await plank.process_plank_final(final, slider_state, plank_users_map={})
+
+    final.answer.assert_awaited_once_with(plank.PLANK_TEXT_SAVE_ERROR, show_alert=True)
+    final.message.edit_text.assert_not_awaited()
+    assert await slider_state.get_state() == PlankState.adjusting
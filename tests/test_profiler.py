@@ -0,0 +1,49 @@
+import logging
+
+import pytest
+
+from db import database as db
+from db.profiler import query_profiler
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    monkeypatch.setattr(query_profiler, "enabled", True)
+    query_profiler.reset()
+    yield query_profiler
+    query_profiler.reset()
+
+
+@pytest.mark.asyncio
+async def test_surfaces_each_stats_window_with_its_plan(profiler):
+    await db.get_user_stats(1, windows=(7, 30))
+
+    window_queries = [e for e in profiler.top() if "plank_daily_stats" in e["sql"]]
+
+    # Both windows share one parameterized statement; only the bound day differs.
+    assert len(window_queries) == 1
+    entry = window_queries[0]
+    assert entry["calls"] == 2
+    assert entry["params"][0] == 1
+    assert isinstance(entry["params"][1], int)
+    assert "USING PRIMARY KEY" in entry["plan"]
+
+
+@pytest.mark.asyncio
+async def test_logs_slow_queries(profiler, monkeypatch, caplog):
+    monkeypatch.setattr(profiler, "threshold", 0)
+
+    with caplog.at_level(logging.WARNING, logger="db.profiler"):
+        await db.get_plank_page(1)
+
+    assert "Slow query" in caplog.text
+    assert "idx_plank_history_user_day" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_disabled_profiler_records_nothing(profiler):
+    profiler.enabled = False
+
+    await db.get_plank_page(1)
+
+    assert profiler.top() == []
@@ -0,0 +1,51 @@
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from services.rate_limiter import RateLimiter, TokenBucket
+
+
+def test_token_bucket_reservations_queue_in_order():
+    bucket = TokenBucket(rate=10, capacity=2)
+    now = bucket.updated
+
+    waits = [bucket.reserve(now) for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1)
+    assert waits[3] == pytest.approx(0.2)
+
+
+@pytest.mark.asyncio
+async def test_per_chat_limit_delays_excess_calls():
+    limiter = RateLimiter(global_rate=1000, chat_rate=100, chat_burst=1)
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(method)
+        return True
+
+    for _ in range(3):
+        await limiter(make_request, None, SendMessage(chat_id=1, text="hi"))
+    await limiter(make_request, None, SendMessage(chat_id=2, text="hi"))
+
+    assert len(calls) == 4
+    assert limiter.snapshot()["delayed_calls"] == 2
+    assert limiter.snapshot()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured(monkeypatch):
+    limiter = RateLimiter()
+    method = AnswerCallbackQuery(callback_query_id="1")
+    attempts = []
+
+    async def flaky_request(bot, request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise TelegramRetryAfter(method=request, message="flood", retry_after=0)
+        return True
+
+    assert await limiter(flaky_request, None, method) is True
+    assert len(attempts) == 2
+    assert limiter.snapshot()["retries"] == 1
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from services.user_registry import UserRegistry, parse_users
+
+
+@pytest.fixture
+def registry(tmp_path):
+    yoga = tmp_path / "users_yoga.json"
+    plank = tmp_path / "users_plank.json"
+    yoga.write_text(json.dumps({"admin": 3, "Mark": 2}))
+    plank.write_text(json.dumps({"ivan": -5}))
+    registry = UserRegistry(str(yoga), str(plank))
+    assert registry.load()
+    return registry
+
+
+def _touch_later(path):
+    """Bump mtime explicitly; some filesystems have coarse timestamps."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_combined_lookup_and_per_feature_offsets(registry):
+    assert registry.is_allowed("mark")
+    assert registry.is_allowed("ivan")
+    assert not registry.is_allowed("stranger")
+    assert registry.yoga == {"admin": 3, "mark": 2}
+    assert registry.plank == {"ivan": -5}
+    assert registry.admin() == "admin"
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [["mark"], {"mark": "3"}, {"mark": 99}, {"": 1}, {"mark": True}],
+)
+def test_parse_users_rejects_invalid_content(raw):
+    with pytest.raises(ValueError):
+        parse_users(raw)
+
+
+def test_invalid_file_keeps_previous_users(registry):
+    with open(registry.paths["plank"], "w") as f:
+        f.write("{broken")
+
+    assert registry.load() is False
+    assert registry.is_allowed("ivan")
+
+
+def test_set_and_remove_user_persist(registry):
+    registry.set_user("plank", "@Olga", 1.5)
+    assert registry.is_allowed("olga")
+    with open(registry.paths["plank"]) as f:
+        assert json.load(f) == {"ivan": -5, "olga": 1.5}
+
+    assert registry.remove_user("plank", "olga") is True
+    assert registry.remove_user("plank", "olga") is False
+    assert not registry.is_allowed("olga")
+
+
+@pytest.mark.asyncio
+async def test_watch_reloads_changed_file(registry):
+    seen = []
+    registry.on_change(lambda r: seen.append(r.version))
+    watcher = asyncio.create_task(registry.watch(interval=0.01, debounce=0.01))
+    try:
+        with open(registry.paths["yoga"], "w") as f:
+            json.dump({"admin": 3, "guest": 0}, f)
+        _touch_later(registry.paths["yoga"])
+
+        for _ in range(100):
+            if registry.is_allowed("guest"):
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        watcher.cancel()
+
+    assert registry.is_allowed("guest")
+    assert not registry.is_allowed("mark")
+    assert seen
@@ -5,6 +5,9 @@ from unittest.mock import Mock
 from utils import (
     get_user_offset,
     convert_utc_to_local,
+    epoch_day_to_date,
+    local_epoch_day,
+    lttb,
     format_time,
     format_time_compact,
     to_seconds,
@@ -32,6 +35,22 @@ def test_convert_utc_to_local(offset, expected_hour):
     assert result.day == 15
 
 
+@pytest.mark.parametrize(
+    "hour, offset, expected",
+    [
+        (12, 0.0, "2025-10-15"),
+        (22, 3.0, "2025-10-16"),  # Already tomorrow in UTC+3
+        (2, -5.0, "2025-10-14"),  # Still yesterday in UTC-5
+    ],
+)
+def test_local_epoch_day(hour, offset, expected):
+    dt_utc = datetime(2025, 10, 15, hour, 0, 0, tzinfo=timezone.utc)
+
+    day = local_epoch_day(dt_utc, offset)
+
+    assert epoch_day_to_date(day).isoformat() == expected
+
+
 # --- Formatting Utils ---
 
 
@@ -99,3 +118,21 @@ def test_validate_user_structure():
 
     msg_channel = Mock()
     msg_channel.from_user = None
+
+
+def test_lttb_keeps_ends_and_peaks():
+    points = [(x, 60 + x % 5, x) for x in range(1000)]
+    points[500] = (500, 300, "peak")
+
+    sampled = lttb(points, 50)
+
+    assert len(sampled) == 50
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    assert (500, 300, "peak") in sampled
+    assert [p[0] for p in sampled] == sorted(p[0] for p in sampled)
+
+
+def test_lttb_returns_short_series_unchanged():
+    points = [(x, x) for x in range(10)]
+
+    assert lttb(points, 50) == points
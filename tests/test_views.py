@@ -1,11 +1,19 @@
+import subprocess
+import sys
+
 import pytest
 import matplotlib
 import matplotlib.pyplot as plt
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 matplotlib.use("Agg")
 
-from views.plank import generate_progress_graph
+from views.plank import (
+    generate_progress_graph,
+    get_plank_slider_keyboard,
+    get_plank_stats_details_keyboard,
+)
+from views.yoga import SlotTimesTable, _build_week_keyboard, get_yoga_time_keyboard
 
 PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
 
@@ -42,3 +50,74 @@ def test_graph_handles_single_point(sample_plank_data):
 
     assert buf is not None
     assert buf.getbuffer().nbytes > 0
+
+
+def test_graph_draws_averages_over_a_long_range():
+    points = [
+        (datetime(2024, 1, 1) + timedelta(weeks=i), 60 + i, 45 + i) for i in range(104)
+    ]
+
+    buf = generate_progress_graph(points)
+
+    assert buf.getvalue().startswith(PNG_SIGNATURE)
+
+
+def test_plank_handlers_do_not_import_matplotlib():
+    code = "import sys, handlers.plank; print('matplotlib' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_keyboards_are_memoized():
+    assert get_plank_slider_keyboard(60) is get_plank_slider_keyboard(60)
+    assert get_plank_slider_keyboard(60) is not get_plank_slider_keyboard(65)
+
+    chosen = datetime(2025, 10, 1)
+    assert get_yoga_time_keyboard(3.0, chosen) is get_yoga_time_keyboard(3.0, chosen)
+
+
+def test_week_keyboard_rolls_over_at_midnight():
+    today = _build_week_keyboard(date(2025, 10, 1))
+    tomorrow = _build_week_keyboard(date(2025, 10, 2))
+
+    assert today.inline_keyboard[0][0].callback_data == "day_2025-10-01"
+    assert tomorrow.inline_keyboard[0][0].callback_data == "day_2025-10-02"
+
+
+def test_details_keyboard_only_offers_existing_pages():
+    first = get_plank_stats_details_keyboard(older=(20000, 7))
+    middle = get_plank_stats_details_keyboard(newer=(20003, 12), older=(20000, 7))
+
+    assert [b.callback_data for b in first.inline_keyboard[0]] == [
+        "details_older:20000:7"
+    ]
+    assert [b.callback_data for b in middle.inline_keyboard[0]] == [
+        "details_newer:20003:12",
+        "details_older:20000:7",
+    ]
+    assert middle.inline_keyboard[-1][0].callback_data == "hide_stats_details"
+
+
+def test_slot_times_group_users_by_offset():
+    table = SlotTimesTable(slots=["16:00", "22:30"])
+    users = {"mark": 3, "olga": 3.0, "ivan_k": -5, "ravi": 5.5}
+
+    assert table.times("16:00", users).splitlines() == [
+        "📍 UTC-5: ivan\\_k — 11:00",
+        "📍 UTC+3: mark, olga — 19:00",
+        "📍 UTC+5:30: ravi — 21:30",
+    ]
+    assert table.times("22:30", users).splitlines()[1] == "📍 UTC+3: mark, olga — 01:30"
+
+
+def test_slot_times_are_reused_until_the_guest_list_changes():
+    table = SlotTimesTable(slots=["16:00"], names_per_offset=2)
+    users = {"a": 0, "b": 0, "c": 0}
+
+    first = table.times("16:00", users)
+    assert first == "📍 UTC+0: a, b +1 — 16:00"
+    assert table.times("16:00", users) is first
+
+    assert table.times("16:00", {"a": 1}) == "📍 UTC+1: a — 17:00"
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from benchmarks.fake_session import FAKE_TOKEN, RecordingSession
+from services.webhook import SECRET_HEADER, build_webhook_app
+
+SECRET = "test-secret"
+
+
+def _update(update_id: int, text: str = "hello") -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1735732800,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Mark"},
+            "text": text,
+        },
+    }
+
+
+@pytest_asyncio.fixture(loop_scope="function")
+async def webhook():
+    dispatcher = Dispatcher()
+    release = asyncio.Event()
+    handled = []
+    running = {"now": 0, "max": 0}
+
+    @dispatcher.message()
+    async def on_message(message: Message):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await release.wait()
+        handled.append(message.message_id)
+        running["now"] -= 1
+
+    bot = Bot(token=FAKE_TOKEN, session=RecordingSession())
+    app = build_webhook_app(
+        dispatcher, bot, SECRET, max_concurrency=2, max_pending=4, drain_timeout=1
+    )
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    yield client, release, handled, running
+    release.set()
+    await client.close()
+
+
+async def _post(client: TestClient, update: dict, secret: str = SECRET) -> int:
+    response = await client.post(
+        "/webhook", json=update, headers={SECRET_HEADER: secret}
+    )
+    return response.status
+
+
+@pytest.mark.asyncio
+async def test_rejects_wrong_secret(webhook):
+    client, release, handled, _ = webhook
+    release.set()
+
+    assert await _post(client, _update(1), secret="wrong") == 401
+    await asyncio.sleep(0.05)
+    assert handled == []
+
+
+@pytest.mark.asyncio
+async def test_acknowledges_before_handling(webhook):
+    client, release, handled, _ = webhook
+
+    assert await _post(client, _update(1)) == 200
+    assert handled == []
+
+    release.set()
+    await asyncio.sleep(0.05)
+    assert handled == [1]
+
+
+@pytest.mark.asyncio
+async def test_bounds_concurrency_and_backlog(webhook):
+    client, release, handled, running = webhook
+
+    statuses = [await _post(client, _update(i)) for i in range(1, 6)]
+    await asyncio.sleep(0.05)
+
+    assert statuses == [200, 200, 200, 200, 503]
+    assert running["max"] == 2
+
+    release.set()
+    await asyncio.sleep(0.05)
+    assert sorted(handled) == [1, 2, 3, 4]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from db.yoga_sessions import YogaSessionStore, new_session
+
+CHAT_A = -100
+CHAT_B = -200
+MESSAGE_ID = 42
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_keyed_by_chat_and_message():
+    store = YogaSessionStore()
+    session = new_session("2999-01-01")
+    session["going"].add("Mark")
+    await store.save(CHAT_A, MESSAGE_ID, session)
+
+    assert await store.get(CHAT_B, MESSAGE_ID) is None
+    assert (await store.get(CHAT_A, MESSAGE_ID))["going"] == {"Mark"}
+
+
+@pytest.mark.asyncio
+async def test_session_survives_restart():
+    session = new_session("2999-01-01")
+    session["going"].add("Olga")
+    session["not_going"].add("Ivan")
+    await YogaSessionStore().save(CHAT_A, MESSAGE_ID, session)
+
+    restarted = YogaSessionStore()
+    assert len(restarted) == 0
+
+    loaded = await restarted.get(CHAT_A, MESSAGE_ID)
+    assert loaded == session
+    assert len(restarted) == 1
+
+
+@pytest.mark.asyncio
+async def test_past_sessions_are_not_kept_in_memory():
+    store = YogaSessionStore()
+    await store.save(CHAT_A, MESSAGE_ID, new_session("2000-01-01"))
+
+    assert len(store) == 0
+    assert (await store.get(CHAT_A, MESSAGE_ID))["date"] == "2000-01-01"
+    assert len(store) == 0
+
+    await store.delete(CHAT_A, MESSAGE_ID)
+    assert await store.get(CHAT_A, MESSAGE_ID) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_votes_are_not_lost():
+    store = YogaSessionStore()
+    await store.save(CHAT_A, MESSAGE_ID, new_session("2999-01-01"))
+    restarted = YogaSessionStore()
+
+    async def vote(name):
+        async with restarted.locked(CHAT_A, MESSAGE_ID):
+            session = await restarted.get(CHAT_A, MESSAGE_ID)
+            session["going"].add(name)
+            await restarted.save(CHAT_A, MESSAGE_ID, session)
+
+    await asyncio.gather(*(vote(f"user{i}") for i in range(10)))
+
+    assert len((await YogaSessionStore().get(CHAT_A, MESSAGE_ID))["going"]) == 10
@@ -1,4 +1,6 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+
+EPOCH = date(1970, 1, 1)
 
 
 def get_user_offset(username: str, user_dict: dict) -> float:
@@ -16,6 +18,60 @@ def convert_utc_to_local(dt_utc: datetime, user_offset: float) -> datetime:
     return dt_utc + timedelta(hours=user_offset)
 
 
+def local_epoch_day(dt_utc: datetime, user_offset: float) -> int:
+    """Return the user's local calendar day as days since 1970-01-01."""
+    if dt_utc.tzinfo is not None:
+        dt_utc = dt_utc.astimezone(timezone.utc).replace(tzinfo=None)
+    return (convert_utc_to_local(dt_utc, user_offset).date() - EPOCH).days
+
+
+def epoch_day_to_date(day: int) -> date:
+    """Inverse of local_epoch_day for the date part."""
+    return EPOCH + timedelta(days=day)
+
+
+def lttb(points: list[tuple], threshold: int) -> list[tuple]:
+    """Downsample points with Largest-Triangle-Three-Buckets.
+
+    Points are tuples sorted by their numeric x (first item) with y as the
+    second item; any further items ride along with the point they belong
+    to. The first and last points are always kept, and from every bucket
+    in between the point spanning the largest triangle with its neighbours
+    is chosen, which preserves peaks and dips of the curve.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = points[0]
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket stands in for the point not chosen yet.
+        next_bucket = points[end : min(int((i + 2) * bucket_size) + 1, len(points))]
+        if not next_bucket:
+            next_bucket = points[-1:]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        best_area = -1.0
+        for point in points[start:end]:
+            area = abs(
+                (previous[0] - avg_x) * (point[1] - previous[1])
+                - (previous[0] - point[0]) * (avg_y - previous[1])
+            )
+            if area > best_area:
+                best_area = area
+                chosen = point
+        sampled.append(chosen)
+        previous = chosen
+
+    sampled.append(points[-1])
+    return sampled
+
+
 def format_time(seconds: int) -> str:
     """Format seconds as a human-friendly minutes/seconds string."""
     m, s = divmod(seconds, 60)
@@ -1,22 +1,27 @@
 import io
 import math
-from datetime import datetime
+from functools import lru_cache
 
 from aiogram import types
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 
 from utils import format_time
 from config import (
+    KEYBOARD_CACHE_SIZE,
     PLANK_BTN_CONFIRM,
     PLANK_BTN_DELETE,
     PLANK_BTN_BACK,
     PLANK_BTN_DETAILS,
     PLANK_BTN_HIDE,
+    PLANK_BTN_NEWER,
+    PLANK_BTN_OLDER,
 )
 
 
+# Keyboards are memoized and shared between messages; never mutate them.
+
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_plank_slider_keyboard(
     seconds: int, record_id: int | None = None
 ) -> types.InlineKeyboardMarkup:
@@ -54,6 +59,7 @@ def get_plank_slider_keyboard(
     return builder.as_markup()
 
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_plank_result_keyboard(record_id: int) -> types.InlineKeyboardMarkup:
     """Build keyboard shown after saving plank result."""
     builder = InlineKeyboardBuilder()
@@ -63,6 +69,7 @@ def get_plank_result_keyboard(record_id: int) -> types.InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@lru_cache(maxsize=1)
 def get_plank_stats_keyboard() -> types.InlineKeyboardMarkup:
     """Build keyboard for the main statistics message."""
     builder = InlineKeyboardBuilder()
@@ -70,18 +77,49 @@ def get_plank_stats_keyboard() -> types.InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def get_plank_stats_details_keyboard() -> types.InlineKeyboardMarkup:
-    """Build keyboard for detailed statistics view."""
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def get_plank_stats_details_keyboard(
+    newer: tuple[int, int] | None = None, older: tuple[int, int] | None = None
+) -> types.InlineKeyboardMarkup:
+    """Build keyboard for one page of the detailed statistics view.
+
+    Args:
+        newer: (day, id) of the page's first row if newer attempts exist.
+        older: (day, id) of the page's last row if older attempts exist.
+    """
     builder = InlineKeyboardBuilder()
-    builder.button(text=PLANK_BTN_HIDE, callback_data="hide_stats_details")
+    navigation = []
+    if newer:
+        navigation.append(
+            types.InlineKeyboardButton(
+                text=PLANK_BTN_NEWER,
+                callback_data=f"details_newer:{newer[0]}:{newer[1]}",
+            )
+        )
+    if older:
+        navigation.append(
+            types.InlineKeyboardButton(
+                text=PLANK_BTN_OLDER,
+                callback_data=f"details_older:{older[0]}:{older[1]}",
+            )
+        )
+    if navigation:
+        builder.row(*navigation)
+    builder.row(
+        types.InlineKeyboardButton(
+            text=PLANK_BTN_HIDE, callback_data="hide_stats_details"
+        )
+    )
     return builder.as_markup()
 
 
-def generate_progress_graph(points: list[tuple[datetime, int]]) -> io.BytesIO | None:
+def generate_progress_graph(points: list[tuple]) -> io.BytesIO | None:
     """Generate progress graph for plank results.
 
     Args:
-        points: List of `(timestamp, duration_seconds)` pairs.
+        points: List of `(timestamp, duration_seconds)` pairs, or
+            `(timestamp, best_seconds, average_seconds)` for aggregated
+            ranges, in which case the average is drawn as a second line.
 
     Returns:
         PNG image buffer with the graph, or None if there is no data.
@@ -89,10 +127,15 @@ def generate_progress_graph(points: list[tuple[datetime, int]]) -> io.BytesIO |
     if not points:
         return None
 
-    # Enable headless backend for server usage
-    plt.switch_backend("Agg")
+    # Matplotlib is imported lazily: only /graph needs it, and it dominates
+    # start-up time. Enable the headless backend for server usage.
+    import matplotlib
 
-    timestamps, durations = zip(*points)
+    matplotlib.use("Agg")
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
+
+    timestamps, durations, *averages = zip(*points)
 
     fig, ax = plt.subplots(figsize=(10, 6))
 
@@ -103,29 +146,47 @@ def generate_progress_graph(points: list[tuple[datetime, int]]) -> io.BytesIO |
         linestyle="-",
         color="#1f77b4",
         linewidth=2,
-        markersize=6,
+        markersize=6 if len(points) <= 60 else 3,
+        label="Best",
     )
+    if averages:
+        ax.plot(
+            timestamps,
+            averages[0],
+            linestyle="--",
+            color="#ff7f0e",
+            linewidth=1.5,
+            label="Average",
+        )
+        ax.legend(loc="upper left")
 
     ax.set_title("Plank Progress", fontsize=16, fontweight="bold", pad=20)
     ax.set_ylabel("Time (seconds)", fontsize=12)
 
     ax.grid(True, which="major", axis="both", linestyle="--", alpha=0.6)
 
-    if len(points) <= 14:
+    span_days = (timestamps[-1] - timestamps[0]).days
+    if span_days <= 14:
         ax.xaxis.set_major_locator(mdates.DayLocator(interval=1))
-    else:
+    elif span_days <= 45:
         ax.xaxis.set_major_locator(mdates.DayLocator(interval=3))
+    else:
+        locator = mdates.AutoDateLocator(maxticks=12)
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
 
     fig.autofmt_xdate(rotation=45, ha="right")
 
     if durations:
-        min_val = min(durations)
+        min_val = min(min(series) for series in (durations, *averages))
         max_val = max(durations)
         lower_bound = max(0, math.floor((min_val - 10) / 10) * 10)
         upper_bound = math.ceil((max_val + 10) / 10) * 10
 
         ax.set_ylim(bottom=lower_bound, top=upper_bound)
-        ticks = range(int(lower_bound), int(upper_bound) + 1, 10)
+        # Ticks every 10 seconds, widened so wide ranges keep about 20 ticks.
+        step = 10 * max(1, math.ceil((upper_bound - lower_bound) / 200))
+        ticks = range(int(lower_bound), int(upper_bound) + 1, step)
         ax.set_yticks(ticks)
 
     plt.tight_layout()
@@ -136,3 +197,9 @@ def generate_progress_graph(points: list[tuple[datetime, int]]) -> io.BytesIO |
     buf.seek(0)
 
     return buf
+
+
+def render_progress_png(points: list[tuple]) -> bytes | None:
+    """Render the progress graph to PNG bytes (picklable for worker processes)."""
+    buf = generate_progress_graph(points)
+    return buf.getvalue() if buf else None
@@ -1,25 +1,40 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 
 from aiogram import types
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from config import (
     DEFAULT_SLOTS_UTC,
+    KEYBOARD_CACHE_SIZE,
+    YOGA_SUMMARY_NAMES_PER_OFFSET,
     YOGA_BTN_BACK_TO_DATES,
     YOGA_BTN_IM_IN,
     YOGA_BTN_NOT_GOING,
     YOGA_BTN_DELETE,
 )
+from utils import escape_markdown
+
+
+# Keyboards are memoized and shared between messages; never mutate them.
 
 
 def get_week_keyboard() -> types.InlineKeyboardMarkup:
-    """Build keyboard for selecting one of the next seven days."""
+    """Return keyboard for selecting one of the next seven days.
+
+    Cached per calendar day, so it is rebuilt once after midnight.
+    """
+    return _build_week_keyboard(datetime.now().date())
+
+
+@lru_cache(maxsize=2)
+def _build_week_keyboard(today: date) -> types.InlineKeyboardMarkup:
+    """Build keyboard for selecting one of the seven days starting today."""
     builder = InlineKeyboardBuilder()
-    now = datetime.now()
 
     weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
     for i in range(7):
-        day = now + timedelta(days=i)
+        day = today + timedelta(days=i)
         date_val = day.strftime("%Y-%m-%d")
         label = f"{weekdays[day.weekday()]} {day.strftime('%d.%m')}"
         builder.button(text=label, callback_data=f"day_{date_val}")
@@ -31,6 +46,7 @@ def get_week_keyboard() -> types.InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_yoga_time_keyboard(
     user_offset: float, chosen_date: datetime
 ) -> types.InlineKeyboardMarkup:
@@ -61,6 +77,7 @@ def get_yoga_time_keyboard(
     return builder.as_markup()
 
 
+@lru_cache(maxsize=1)
 def get_yoga_attendance_keyboard() -> types.InlineKeyboardMarkup:
     """Build keyboard for confirming or rejecting yoga attendance."""
     builder = InlineKeyboardBuilder()
@@ -71,3 +88,71 @@ def get_yoga_attendance_keyboard() -> types.InlineKeyboardMarkup:
         types.InlineKeyboardButton(text=YOGA_BTN_DELETE, callback_data="cancel_session")
     )
     return builder.as_markup()
+
+
+def format_utc_offset(offset: float) -> str:
+    """Format an hour offset as UTC+3, UTC-5 or UTC+5:30."""
+    sign = "-" if offset < 0 else "+"
+    hours, minutes = divmod(round(abs(offset) * 60), 60)
+    return f"UTC{sign}{hours}" + (f":{minutes:02d}" if minutes else "")
+
+
+class SlotTimesTable:
+    """Local start time of every UTC slot for the yoga guest list.
+
+    Guests sharing a UTC offset see the same local time, so each slot's
+    summary has one line per offset ("UTC+3: mark, olga — 19:00") rather
+    than one per guest. The lines of all slots are rendered when the guest
+    list changes and reused for every slot click until the next change.
+    """
+
+    def __init__(
+        self,
+        slots: list[str] = DEFAULT_SLOTS_UTC,
+        names_per_offset: int = YOGA_SUMMARY_NAMES_PER_OFFSET,
+    ):
+        self.slots = slots
+        self.names_per_offset = names_per_offset
+        self._users: dict[str, float] | None = None
+        self._groups: list[tuple[float, str]] = []
+        self._texts: dict[str, str] = {}
+
+    def rebuild(self, users: dict[str, float]):
+        """Group the guests by offset and render every slot's lines."""
+        by_offset: dict[float, list[str]] = {}
+        for username, offset in users.items():
+            by_offset.setdefault(float(offset), []).append(escape_markdown(username))
+
+        groups = []
+        for offset in sorted(by_offset):
+            names = by_offset[offset]
+            shown = ", ".join(names[: self.names_per_offset])
+            if len(names) > self.names_per_offset:
+                shown += f" +{len(names) - self.names_per_offset}"
+            groups.append((offset, f"📍 {format_utc_offset(offset)}: {shown}"))
+
+        self._groups = groups
+        self._texts = {slot: self._render(slot) for slot in self.slots}
+        self._users = users
+
+    def on_registry_change(self, registry):
+        """UserRegistry.on_change callback: rebuild for the new yoga list."""
+        self.rebuild(registry.yoga)
+
+    def times(self, utc_time: str, users: dict[str, float]) -> str:
+        """Return the summary lines of a "HH:MM" UTC slot for these users."""
+        if users is not self._users:
+            self.rebuild(users)
+        text = self._texts.get(utc_time)
+        return text if text is not None else self._render(utc_time)
+
+    def _render(self, utc_time: str) -> str:
+        h, m = map(int, utc_time.split(":"))
+        lines = []
+        for offset, prefix in self._groups:
+            local = round(h * 60 + m + offset * 60) % (24 * 60)
+            lines.append(f"{prefix} — {local // 60:02d}:{local % 60:02d}")
+        return "\n".join(lines)
+
+
+yoga_slot_times = SlotTimesTable()